@@ -1,31 +1,52 @@
 from datetime import datetime, timezone, timedelta
-from flask import Flask, request
+from flask import Flask, Response, request, stream_with_context
 from flask_caching import Cache
 from flask_cors import CORS
 from flask_jwt_extended import create_access_token, get_jwt, jwt_required, JWTManager, get_jwt_identity
 from flask_migrate import Migrate
-from flask_restful import Api, Resource, reqparse
+from flask_restful import Api, Resource
 from flask_sqlalchemy import SQLAlchemy
 from functools import wraps
-from sqlalchemy import select, func, or_
+from sqlalchemy import select, func, or_, tuple_, union_all, update, insert, delete
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import selectinload
-from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
+from werkzeug.middleware.proxy_fix import ProxyFix
+from application.session import RoutingSession
+import json
 import os
-import uuid
+import time
 
 
 app = Flask(__name__)
 app.config.from_object("application.config.Config")
+if app.config["PROXY_FIX_X_FOR"]:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["PROXY_FIX_X_FOR"])
 api = Api(app)
 cache = Cache(app)
 cors = CORS(app)
-db = SQLAlchemy(app)
+db = SQLAlchemy(app, session_options={"class_": RoutingSession})
 jwt = JWTManager(app)
 migrate = Migrate(app, db)
 
 from application import init_db
-from application.models import User, Skill, SkillWanted, SwapRequest, Feedback
+from application.models import User, Skill, SkillWanted, SkillTerm, SwapRequest, Feedback, UserRating, upsert
+from application.pagination import IST, encode_cursor, decode_cursor, parse_limit, parse_timestamp
+from application.search import skill_search
+from application.matching import skill_matches
+from application.hashing import password_hasher, HashingPoolSaturated
+from application.caching import cached_view, conditional_view, cached_profile, resolve_user_id, invalidate_on_commit
+from application.indexing import SkillEntry, record_skill_changes
+from application import commands
+from application import metrics
+from application.routing import read_from_replica, current_identity, stick_to
+from application.revocation import token_revocations
+from application.ratelimit import rate_limited
+from application.events import event_broker
+from application.media import store_profile_photo, send_profile_photo, UploadTooLarge, UnsupportedImage
+from application.validation import Schema, Field, Invalid
+from application import availability as week
+from application import geo
+from application import compression
 
 
 def role_required(role):
@@ -41,57 +62,127 @@ def role_required(role):
     return decorator
 
 
+def hashing_unavailable():
+    return {"message": "Server is busy. Please try again shortly."}, 503, {"Retry-After": "1"}
+
+
+def lookup_user_id(user_uuid):
+    return resolve_user_id(
+        user_uuid,
+        lambda key: db.session.scalars(select(User.id).filter_by(uuid=key)).first()
+    )
+
+
+def parse_min_overlap():
+    """The min_overlap query parameter in minutes, or None when absent; raises ValueError when malformed"""
+    value = request.args.get("min_overlap")
+    return max(1, int(value)) if value else None
+
+
+def availability_overlaps(user_id, candidate_ids, min_minutes):
+    """Minutes of weekly availability each public candidate shares with user_id, for those sharing at least min_minutes"""
+    mine = week.from_bytes(db.session.scalar(select(User.availability_mask).filter_by(id=user_id)))
+    if not mine or not candidate_ids:
+        return {}
+    overlaps = {}
+    rows = db.session.execute(
+        select(User.id, User.availability_mask).filter(User.id.in_(candidate_ids), User.is_public == True)
+    )
+    for candidate_id, mask in rows:
+        minutes = week.overlap_minutes(mine, week.from_bytes(mask))
+        if minutes >= min_minutes:
+            overlaps[candidate_id] = minutes
+    return overlaps
+
+
+def parse_near():
+    """The near and radius_km query parameters as (latitude, longitude, radius_km), or None when near is absent; raises ValueError when unusable"""
+    near = request.args.get("near")
+    if not near:
+        return None
+    point = geo.geocode(near)
+    if point is None:
+        raise ValueError("near must be a known place or a latitude,longitude pair")
+    maximum = app.config["NEAR_MAX_RADIUS_KM"]
+    try:
+        radius_km = float(request.args.get("radius_km") or app.config["NEAR_DEFAULT_RADIUS_KM"])
+    except ValueError:
+        radius_km = None
+    if radius_km is None or not 0 < radius_km <= maximum:
+        raise ValueError(f"radius_km must be a number of kilometres up to {maximum:g}")
+    return point[0], point[1], radius_km
+
+
+def users_near(latitude, longitude, radius_km):
+    """Distance in km to every public user within radius_km of the point.
+
+    The geohash cells covering the circle narrow the candidates through
+    ix_users_is_public_geohash; exact distances then drop the corners.
+    """
+    candidates = select(User.id, User.latitude, User.longitude).filter(User.is_public == True)
+    prefixes = geo.covering_prefixes(latitude, longitude, radius_km)
+    if prefixes is None:
+        query = candidates.filter(User.geohash.is_not(None))
+    else:
+        # One index range per cell; ORed ranges leave SQLite scanning every public user until ANALYZE has run
+        query = union_all(*(
+            candidates.filter(User.geohash >= prefix, User.geohash < prefix + geo.PREFIX_END) for prefix in prefixes
+        ))
+    distances = {}
+    for user_id, user_latitude, user_longitude in db.session.execute(query):
+        distance = geo.distance_km(latitude, longitude, user_latitude, user_longitude)
+        if distance <= radius_km:
+            distances[user_id] = distance
+    return distances
+
+
+def user_profile(user_id, user=None):
+    """Serialized profile shared by every endpoint that returns a single user"""
+    def build():
+        loaded = user or db.session.scalars(
+            select(User)
+            .filter_by(id=user_id)
+            .options(selectinload(User.skills_offered), selectinload(User.skills_wanted), selectinload(User.rating_summary))
+        ).first()
+        return loaded.to_dict() if loaded else None
+    return cached_profile(int(user_id), build)
+
+
 # Authentication Endpoints
 class RegisterUser(Resource):
-    def __init__(self):
-        self.parser = reqparse.RequestParser()
-        self.parser.add_argument("name", type=str, required=True, help="Name is required")
-        self.parser.add_argument("email", type=str, required=True, help="Email is required")
-        self.parser.add_argument("password", type=str, required=True, help="Password is required")
-        self.parser.add_argument("location", type=str, required=False)
-        self.parser.add_argument("is_public", type=bool, default=True)
-        
-        self.UPLOAD_FOLDER = 'static/uploads/profile_photos'
-        self.ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp'}
-        self.MAX_FILE_SIZE = 5 * 1024 * 1024
-
-    def allowed_file(self, filename):
-        return '.' in filename and filename.rsplit('.', 1)[1].lower() in self.ALLOWED_EXTENSIONS
-
-    def save_profile_photo(self, file):
-        if file and self.allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            file_extension = filename.rsplit('.', 1)[1].lower()
-            unique_filename = f"{uuid.uuid4()}.{file_extension}"
-            
-            os.makedirs(self.UPLOAD_FOLDER, exist_ok=True)
-            
-            file_path = os.path.join(self.UPLOAD_FOLDER, unique_filename)
-            file.save(file_path)
-            
-            return unique_filename
-        return None
+    # Registrations with a profile photo arrive as multipart forms, which Schema.parse reads too
+    schema = Schema(
+        name=Field(str, required=True, help="Name is required"),
+        email=Field(str, required=True, help="Email is required"),
+        password=Field(str, required=True, help="Password is required"),
+        location=Field(str),
+        is_public=Field(bool, default=True)
+    )
 
     def post(self):
-        data = self.parser.parse_args()
+        data = self.schema.parse()
         
         user = db.session.scalars(select(User).filter_by(email=data["email"])).first()
         if user:
             return {"message": "Email already in use"}, 400
+
+        try:
+            password_hash = password_hasher.hash(data["password"])
+        except HashingPoolSaturated:
+            return hashing_unavailable()
         
         profile_photo_filename = None
+        photo_created = False
         if 'profile_photo' in request.files:
             file = request.files['profile_photo']
             if file and file.filename != '':
-                if len(file.read()) > self.MAX_FILE_SIZE:
+                try:
+                    profile_photo_filename, photo_created = store_profile_photo(file.stream)
+                except UploadTooLarge:
                     return {"message": "File size too large. Maximum 5MB allowed."}, 400
-                file.seek(0)
-                
-                profile_photo_filename = self.save_profile_photo(file)
-                if not profile_photo_filename:
+                except UnsupportedImage:
                     return {"message": "Invalid file format. Only PNG, JPG, JPEG, and WEBP allowed."}, 400
         
-        password_hash = generate_password_hash(data["password"])
         new_user = User(
             name=data["name"],
             email=data["email"],
@@ -105,6 +196,7 @@ class RegisterUser(Resource):
         try:
             db.session.add(new_user)
             db.session.commit()
+            stick_to(new_user.id)
             
             access_token = create_access_token(
                 identity=str(new_user.id),
@@ -119,29 +211,34 @@ class RegisterUser(Resource):
             return {"user": new_user.to_dict(), "token": access_token}, 201
         except Exception as e:
             db.session.rollback()
-            if profile_photo_filename:
+            # Deduplicated photos may belong to other users, only remove ones this upload created
+            if photo_created:
                 try:
-                    os.remove(os.path.join(self.UPLOAD_FOLDER, profile_photo_filename))
+                    os.remove(os.path.join(app.config["PROFILE_PHOTO_FOLDER"], profile_photo_filename))
                 except:
                     pass
             return {"message": "Registration failed. Please try again."}, 500
 
 
 class LoginUser(Resource):
-    def __init__(self):
-        self.parser = reqparse.RequestParser()
-        self.parser.add_argument("email", type=str, required=True, help="Email is required")
-        self.parser.add_argument("password", type=str, required=True, help="Password is required")
+    schema = Schema(
+        email=Field(str, required=True, help="Email is required"),
+        password=Field(str, required=True, help="Password is required")
+    )
 
+    @rate_limited("login")
     def post(self):
-        data = self.parser.parse_args()
+        data = self.schema.parse()
         user = db.session.scalars(select(User).filter_by(email=data["email"])).first()
 
         if not user:
             return {"message": "Invalid email or password"}, 401
 
-        if not check_password_hash(user.password_hashed, data["password"]):
-            return {"message": "Invalid email or password"}, 401
+        try:
+            if not password_hasher.verify(user.password_hashed, data["password"]):
+                return {"message": "Invalid email or password"}, 401
+        except HashingPoolSaturated:
+            return hashing_unavailable()
 
         if user.status == "blocked":
             return {"message": "Account is blocked"}, 403
@@ -149,6 +246,19 @@ class LoginUser(Resource):
         if user.status == "pending":
             return {"message": "Account is pending verification"}, 403
 
+        # Upgrade hashes made with older parameters; a busy pool or a failed
+        # write just defers it to a later login, the password already checked out
+        if password_hasher.needs_rehash(user.password_hashed):
+            try:
+                user.password_hashed = password_hasher.hash(data["password"])
+                db.session.commit()
+                stick_to(user.id)
+            except HashingPoolSaturated:
+                pass
+            except SQLAlchemyError:
+                db.session.rollback()
+                app.logger.warning("Could not store the upgraded password hash for user %s", user.id, exc_info=True)
+
         access_token = create_access_token(
             identity=str(user.id),
             additional_claims={
@@ -159,12 +269,14 @@ class LoginUser(Resource):
             }
         )
 
-        return {"user": user.to_dict(), "token": access_token}, 200
+        return {"user": user_profile(user.id, user), "token": access_token}, 200
 
 
 class LogoutUser(Resource):
     @jwt_required()
     def post(self):
+        claims = get_jwt()
+        token_revocations.revoke(claims["jti"], claims["exp"])
         return {"success": True}, 200
 
 
@@ -172,76 +284,165 @@ class GetCurrentUser(Resource):
     @jwt_required()
     def get(self):
         current_user_id = get_jwt_identity()
-        user = db.session.get(User, current_user_id)
-        if not user:
+        profile = user_profile(current_user_id)
+        if not profile:
             return {"user": None}, 401
-        return {"user": user.to_dict()}, 200
+        return {"user": profile}, 200
 
 
 # User Endpoints
 class GetAllUsers(Resource):
     @jwt_required()
-    @cache.cached(timeout=60, key_prefix="public_users_list")
+    @rate_limited("users")
+    @read_from_replica
     def get(self):
-        users = db.session.scalars(
-            select(User)
-            .filter_by(is_public=True)
-            .options(selectinload(User.skills_offered), selectinload(User.skills_wanted))
-        ).all()
-        return {"users": [user.to_dict() for user in users]}, 200
+        limit = parse_limit(
+            request.args.get("limit"),
+            app.config["USERS_PAGE_LIMIT"],
+            app.config["USERS_PAGE_MAX_LIMIT"]
+        )
+        after = request.args.get("after")
+        after_id = None
+        if after:
+            try:
+                after_id = int(decode_cursor(after)[0])
+            except (ValueError, TypeError, IndexError):
+                return {"message": "Invalid cursor"}, 400
+        try:
+            near = parse_near()
+        except ValueError as e:
+            return {"message": str(e)}, 400
+
+        def build_page():
+            distances = None
+            if near:
+                distances = users_near(*near)
+                page_ids = sorted(user_id for user_id in distances if after_id is None or user_id > after_id)
+                query = select(User).filter(User.id.in_(page_ids[:limit + 1]))
+            else:
+                query = select(User).filter_by(is_public=True)
+                if after_id is not None:
+                    query = query.filter(User.id > after_id)
+
+            # Fetch one extra row to know whether another page follows
+            users = db.session.scalars(
+                query
+                .order_by(User.id)
+                .limit(limit + 1)
+                .options(selectinload(User.skills_offered), selectinload(User.skills_wanted), selectinload(User.rating_summary))
+            ).all()
+
+            has_more = len(users) > limit
+            users = users[:limit]
+            results = []
+            for user in users:
+                result = user.to_dict(photo_variant="thumb")
+                if distances is not None:
+                    result["distanceKm"] = round(distances[user.id], 1)
+                results.append(result)
+            return {
+                "users": results,
+                "next": encode_cursor(users[-1].id) if has_more else None
+            }
+
+        key = f"public_users_list:{after_id or 0}:{limit}"
+        if near:
+            key += ":near:{}:{}:{}".format(*near)
+        # Arbitrary coordinates would crowd the cache, so distance filtered pages only get 304s
+        return conditional_view(key, ["users", "skills", "skills_wanted"], build_page, store=near is None)
 
 
 class GetUserById(Resource):
+    @read_from_replica
     def get(self, user_id):
-        user = db.session.scalars(
-            select(User)
-            .filter_by(uuid=user_id)
-            .options(selectinload(User.skills_offered), selectinload(User.skills_wanted))
-        ).first()
-        if not user:
+        user_pk = lookup_user_id(user_id)
+        profile = user_profile(user_pk) if user_pk is not None else None
+        if not profile:
             return {"message": "User not found"}, 404
-        return {"user": user.to_dict()}, 200
+        return {"user": profile}, 200
 
 
 class SearchUsers(Resource):
+    @read_from_replica
+    @rate_limited("search")
     def get(self):
         skill_query = request.args.get('skill', '')
         if not skill_query:
             return {"users": []}, 200
-        
-        users = db.session.scalars(
-            select(User)
-            .filter(User.is_public == True)
-            .join(User.skills_offered, isouter=True)
-            .join(User.skills_wanted, isouter=True)
-            .filter(
-                or_(
-                    Skill.name.ilike(f'%{skill_query}%'),
-                    SkillWanted.name.ilike(f'%{skill_query}%')
-                )
-            )
-            .options(selectinload(User.skills_offered), selectinload(User.skills_wanted))
-            .distinct()
-        ).all()
-        
-        return {"users": [user.to_dict() for user in users]}, 200
+
+        limit = parse_limit(
+            request.args.get("limit"),
+            app.config["USERS_PAGE_LIMIT"],
+            app.config["USERS_PAGE_MAX_LIMIT"]
+        )
+        try:
+            min_overlap = parse_min_overlap()
+        except ValueError:
+            return {"message": "min_overlap must be a number of minutes"}, 400
+        viewer = current_identity()
+        if min_overlap and viewer is None:
+            return {"message": "Sign in to filter by shared availability"}, 401
+        try:
+            near = parse_near()
+        except ValueError as e:
+            return {"message": str(e)}, 400
+
+        def build_results():
+            # The index covers private profiles too, so over-fetch before filtering them out
+            pool = limit * (app.config["AVAILABILITY_FILTER_POOL"] if min_overlap else 2)
+            distances = users_near(*near) if near else None
+            if distances is not None and not distances:
+                return {"users": []}
+            ranked = skill_search.search(skill_query, pool, allowed=distances)
+            overlaps = None
+            if min_overlap:
+                overlaps = availability_overlaps(int(viewer), [user_id for user_id, _ in ranked], min_overlap)
+                ranked = [(user_id, score) for user_id, score in ranked if user_id in overlaps][:limit]
+            if not ranked:
+                return {"users": []}
+            order = {user_id: position for position, (user_id, _) in enumerate(ranked)}
+
+            users = db.session.scalars(
+                select(User)
+                .filter(User.id.in_(order), User.is_public == True)
+                .options(selectinload(User.skills_offered), selectinload(User.skills_wanted), selectinload(User.rating_summary))
+            ).all()
+            users.sort(key=lambda user: order[user.id])
+            results = []
+            for user in users[:limit]:
+                result = user.to_dict(photo_variant="thumb")
+                if overlaps is not None:
+                    result["overlapMinutes"] = overlaps[user.id]
+                if distances is not None:
+                    result["distanceKm"] = round(distances[user.id], 1)
+                results.append(result)
+            return {"users": results}
+
+        # Queries are too varied to cache the results, but unchanged polls can still get a 304
+        key, tags = f"search:{skill_query}:{limit}", ["users", "skills", "skills_wanted"]
+        if min_overlap:
+            key, tags = f"{key}:{viewer}:{min_overlap}", tags + [f"users:{viewer}"]
+        if near:
+            key += ":near:{}:{}:{}".format(*near)
+        return conditional_view(key, tags, build_results, store=False)
 
 
 class UpdateUserProfile(Resource):
+    schema = Schema(
+        name=Field(str),
+        location=Field(str),
+        profilePhoto=Field(str),
+        isPublic=Field(bool)
+    )
+
     @jwt_required()
     def put(self):
         current_user_id = get_jwt_identity()
+        data = self.schema.parse()
         user = db.session.get(User, current_user_id)
         if not user:
             return {"message": "User not found"}, 404
         
-        parser = reqparse.RequestParser()
-        parser.add_argument("name", type=str)
-        parser.add_argument("location", type=str)
-        parser.add_argument("profilePhoto", type=str)
-        parser.add_argument("isPublic", type=bool)
-        data = parser.parse_args()
-        
         if data.get("name"):
             user.name = data["name"]
         if data.get("location"):
@@ -253,28 +454,32 @@ class UpdateUserProfile(Resource):
         
         try:
             db.session.commit()
-            return {"user": user.to_dict()}, 200
+            return {"user": user_profile(user.id, user)}, 200
         except Exception as e:
             db.session.rollback()
             return {"message": "Profile update failed"}, 500
 
 
 class UpdateUserAvailability(Resource):
+    schema = Schema(availability=Field(list, required=True))
+
     @jwt_required()
     def put(self):
         current_user_id = get_jwt_identity()
+        data = self.schema.parse()
         user = db.session.get(User, current_user_id)
         if not user:
             return {"message": "User not found"}, 404
         
-        data = request.json
-        user.availability = data["availability"]
+        try:
+            user.availability = data["availability"]
+        except ValueError as e:
+            return {"message": str(e)}, 400
         user.updated_at = datetime.now(timezone(timedelta(hours=5, minutes=30)))
         
         try:
             db.session.commit()
-            cache.delete("public_users_list")
-            return {"user": user.to_dict()}, 200
+            return {"user": user_profile(user.id, user)}, 200
         except Exception as e:
             db.session.rollback()
             return {"message": "Failed to update availability"}, 500
@@ -293,8 +498,7 @@ class TogglePublicProfile(Resource):
         
         try:
             db.session.commit()
-            cache.delete("public_users_list")
-            return {"user": user.to_dict()}, 200
+            return {"user": user_profile(user.id, user)}, 200
         except Exception as e:
             db.session.rollback()
             return {"message": "Failed to toggle public profile"}, 500
@@ -302,16 +506,17 @@ class TogglePublicProfile(Resource):
 
 # Skills Endpoints
 class AddSkillOffered(Resource):
+    schema = Schema(
+        name=Field(str, required=True),
+        description=Field(str, required=True),
+        category=Field(str),
+        level=Field(str, choices=Skill.level.type.enums)
+    )
+
     @jwt_required()
     def post(self):
         current_user_id = get_jwt_identity()
-        
-        parser = reqparse.RequestParser()
-        parser.add_argument("name", type=str, required=True)
-        parser.add_argument("description", type=str, required=True)
-        parser.add_argument("category", type=str)
-        parser.add_argument("level", type=str)
-        data = parser.parse_args()
+        data = self.schema.parse()
         
         skill = Skill(
             user_id=current_user_id,
@@ -331,16 +536,17 @@ class AddSkillOffered(Resource):
 
 
 class AddSkillWanted(Resource):
+    schema = Schema(
+        name=Field(str, required=True),
+        description=Field(str, required=True),
+        category=Field(str),
+        levelNeeded=Field(str, choices=SkillWanted.level_needed.type.enums)
+    )
+
     @jwt_required()
     def post(self):
         current_user_id = get_jwt_identity()
-        
-        parser = reqparse.RequestParser()
-        parser.add_argument("name", type=str, required=True)
-        parser.add_argument("description", type=str, required=True)
-        parser.add_argument("category", type=str)
-        parser.add_argument("levelNeeded", type=str)
-        data = parser.parse_args()
+        data = self.schema.parse()
         
         skill = SkillWanted(
             user_id=current_user_id,
@@ -399,40 +605,198 @@ class RemoveSkillWanted(Resource):
             return {"message": "Failed to remove skill"}, 500
 
 
+class BatchUpdateSkills(Resource):
+    """Apply adds and removes to both skill lists in one transaction.
+
+    Body: {"offered": {"add": [...], "remove": [ids]}, "wanted": {...}}.
+    Adds take the same fields as the single-skill endpoints.
+    """
+    KINDS = {
+        "offered": (Skill, "level", "level", "skillsOffered", AddSkillOffered.schema),
+        "wanted": (SkillWanted, "level_needed", "levelNeeded", "skillsWanted", AddSkillWanted.schema),
+    }
+
+    @jwt_required()
+    def post(self):
+        current_user_id = int(get_jwt_identity())
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return {"message": "Expected a JSON object"}, 400
+
+        changes = {}
+        for kind, (model, column, field, _, schema) in self.KINDS.items():
+            change = data.get(kind)
+            if change is None:
+                change = {}
+            if not isinstance(change, dict):
+                return {"message": f"{kind} must be an object"}, 400
+            adds, removes = change.get("add"), change.get("remove")
+            adds, removes = [] if adds is None else adds, [] if removes is None else removes
+            if not isinstance(adds, list) or not isinstance(removes, list):
+                return {"message": f"{kind}.add and {kind}.remove must be lists"}, 400
+            rows = []
+            for item in adds:
+                if not isinstance(item, dict):
+                    return {"message": f"{kind}.add must hold skill objects"}, 400
+                try:
+                    item = schema.validate(item)
+                except Invalid as e:
+                    return {"message": {e.field: e.message}}, 400
+                rows.append({
+                    "user_id": current_user_id,
+                    "name": item["name"],
+                    "description": item["description"],
+                    "category": item.get("category"),
+                    column: item.get(field)
+                })
+            changes[kind] = (rows, set(map(str, removes)))
+
+        if sum(len(rows) + len(removes) for rows, removes in changes.values()) > app.config["SKILL_BATCH_MAX_ITEMS"]:
+            return {"message": f"At most {app.config['SKILL_BATCH_MAX_ITEMS']} changes per batch"}, 400
+
+        session = db.session
+        tables = {Skill: "skills", SkillWanted: "skills_wanted"}
+        try:
+            for kind, (rows, removes) in changes.items():
+                model = self.KINDS[kind][0]
+                if removes:
+                    removed = session.scalars(
+                        delete(model)
+                        .where(model.user_id == current_user_id, model.uuid.in_(removes))
+                        .returning(model.id)
+                        .execution_options(synchronize_session=False)
+                    ).all()
+                    if len(removed) != len(removes):
+                        session.rollback()
+                        return {"message": "Skill not found"}, 404
+                    record_skill_changes(session, removed=[(kind, skill_id) for skill_id in removed])
+                if rows:
+                    SkillTerm.assign(rows)
+                    ids = session.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), rows).all()
+                    record_skill_changes(session, added=[
+                        SkillEntry(kind, skill_id, current_user_id, row["name"], row["description"], row["category"], row["term_id"])
+                        for skill_id, row in zip(ids, rows)
+                    ])
+                if rows or removes:
+                    invalidate_on_commit(session, {tables[model], f"users:{current_user_id}"})
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            return {"message": "Failed to update skills"}, 500
+
+        response = {}
+        for model, _, _, key, _ in self.KINDS.values():
+            skills = session.scalars(select(model).filter_by(user_id=current_user_id).order_by(model.id))
+            response[key] = [skill.to_dict() for skill in skills]
+        return response, 200
+
+
 # Swap Request Endpoints
 class GetSwapRequests(Resource):
+    BOXES = {"sent": SwapRequest.sender_id, "received": SwapRequest.receiver_id}
+
     @jwt_required()
+    @read_from_replica
     def get(self):
-        current_user_id = get_jwt_identity()
-        
-        sent_requests = db.session.scalars(
-            select(SwapRequest)
-            .filter_by(sender_id=current_user_id)
-            .options(selectinload(SwapRequest.sender), selectinload(SwapRequest.receiver))
-        ).all()
-        
-        received_requests = db.session.scalars(
-            select(SwapRequest)
-            .filter_by(receiver_id=current_user_id)
-            .options(selectinload(SwapRequest.sender), selectinload(SwapRequest.receiver))
-        ).all()
-        
-        return {
-            "sent": [req.to_dict() for req in sent_requests],
-            "received": [req.to_dict() for req in received_requests]
-        }, 200
+        current_user_id = int(get_jwt_identity())
+        limit = parse_limit(
+            request.args.get("limit"),
+            app.config["SWAP_REQUESTS_PAGE_LIMIT"],
+            app.config["SWAP_REQUESTS_PAGE_MAX_LIMIT"]
+        )
+
+        box = request.args.get("box", "all")
+        if box != "all" and box not in self.BOXES:
+            return {"message": "box must be one of all, sent, received"}, 400
+        boxes = list(self.BOXES) if box == "all" else [box]
+
+        statuses = [status for status in request.args.get("status", "").split(",") if status]
+        if any(status not in SwapRequest.status.type.enums for status in statuses):
+            return {"message": f"status must be among {', '.join(SwapRequest.status.type.enums)}"}, 400
+
+        since = None
+        if request.args.get("updated_since"):
+            try:
+                since = parse_timestamp(request.args["updated_since"])
+            except ValueError:
+                return {"message": "updated_since must be an ISO 8601 timestamp"}, 400
+
+        # The cursor holds one keyset position per box: null before the first page, false once exhausted
+        positions = {name: None for name in boxes}
+        if request.args.get("after"):
+            try:
+                decoded = decode_cursor(request.args["after"])
+                positions = dict(zip(boxes, decoded, strict=True))
+                for name, position in positions.items():
+                    if position not in (None, False):
+                        positions[name] = (parse_timestamp(position[0]), int(position[1]))
+            except (ValueError, TypeError, IndexError):
+                return {"message": "Invalid cursor"}, 400
+
+        # Newest first when browsing; oldest change first when syncing, so the sync can resume
+        key_column = SwapRequest.created_at if since is None else SwapRequest.updated_at
+
+        def build_page(column, position):
+            if position is False:
+                return [], False
+            query = select(SwapRequest).filter(column == current_user_id)
+            if statuses:
+                query = query.filter(SwapRequest.status.in_(statuses))
+            if since is None:
+                if position:
+                    query = query.filter(tuple_(key_column, SwapRequest.id) < tuple_(*position))
+                query = query.order_by(key_column.desc(), SwapRequest.id.desc())
+            else:
+                query = query.filter(SwapRequest.updated_at > since)
+                if position:
+                    query = query.filter(tuple_(key_column, SwapRequest.id) > tuple_(*position))
+                query = query.order_by(key_column, SwapRequest.id)
+
+            rows = db.session.scalars(
+                query
+                .limit(limit + 1)
+                .options(selectinload(SwapRequest.sender), selectinload(SwapRequest.receiver))
+            ).all()
+            if len(rows) <= limit:
+                return rows, False
+            rows = rows[:limit]
+            last = rows[-1]
+            return rows, [(last.created_at if since is None else last.updated_at).isoformat(), last.id]
+
+        def build_requests():
+            result = {}
+            next_positions = []
+            for name in boxes:
+                rows, next_position = build_page(self.BOXES[name], positions[name])
+                result[name] = [req.to_dict() for req in rows]
+                next_positions.append(next_position)
+            result["next"] = encode_cursor(*next_positions) if any(next_positions) else None
+            if since is not None:
+                # Once next is null, clients resume syncing from this timestamp
+                updates = [req["updatedAt"] for name in boxes for req in result[name]]
+                result["updatedUntil"] = max(updates, default=since.isoformat())
+            return result
+
+        # Each updated_since poll names a new timestamp, so those results are never asked for twice; ETag only
+        return conditional_view(
+            f"swap_requests:{current_user_id}:{request.query_string.decode()}",
+            [f"users:{current_user_id}:swap_requests"],
+            build_requests,
+            store=since is None
+        )
 
 
 class CreateSwapRequest(Resource):
+    schema = Schema(
+        receiverId=Field(str, required=True),
+        skillOffered=Field(dict, required=True),
+        skillRequested=Field(dict, required=True)
+    )
+
     @jwt_required()
     def post(self):
         current_user_id = get_jwt_identity()
-        
-        parser = reqparse.RequestParser()
-        parser.add_argument("receiverId", type=str, required=True)
-        parser.add_argument("skillOffered", type=dict, required=True)
-        parser.add_argument("skillRequested", type=dict, required=True)
-        data = parser.parse_args()
+        data = self.schema.parse()
         
         # Get receiver by UUID
         receiver = db.session.scalars(
@@ -459,13 +823,12 @@ class CreateSwapRequest(Resource):
 
 
 class UpdateSwapRequestStatus(Resource):
+    schema = Schema(status=Field(str, required=True, choices=SwapRequest.status.type.enums))
+
     @jwt_required()
     def put(self, request_id):
         current_user_id = get_jwt_identity()
-        
-        parser = reqparse.RequestParser()
-        parser.add_argument("status", type=str, required=True)
-        data = parser.parse_args()
+        data = self.schema.parse()
         
         swap_request = db.session.scalars(
             select(SwapRequest)
@@ -516,33 +879,185 @@ class DeleteSwapRequest(Resource):
             return {"message": "Failed to delete swap request"}, 500
 
 
+class SuggestSwapSlots(Resource):
+    """Meeting times in the coming days when both parties to a swap are available"""
+
+    @jwt_required()
+    def get(self, request_id):
+        current_user_id = int(get_jwt_identity())
+        duration = parse_limit(request.args.get("duration"), 60, 24 * 60)
+        count = parse_limit(request.args.get("count"), 5, 50)
+        days = parse_limit(request.args.get("days"), 14, app.config["SLOT_SUGGESTION_MAX_DAYS"])
+        after = datetime.now(IST)
+        if request.args.get("after"):
+            try:
+                after = parse_timestamp(request.args["after"]).replace(tzinfo=IST)
+            except ValueError:
+                return {"message": "after must be an ISO 8601 timestamp"}, 400
+
+        swap_request = db.session.scalars(
+            select(SwapRequest)
+            .filter_by(uuid=request_id)
+            .filter(or_(
+                SwapRequest.sender_id == current_user_id,
+                SwapRequest.receiver_id == current_user_id
+            ))
+        ).first()
+        if not swap_request:
+            return {"message": "Swap request not found"}, 404
+
+        masks = dict(db.session.execute(
+            select(User.id, User.availability_mask)
+            .filter(User.id.in_([swap_request.sender_id, swap_request.receiver_id]))
+        ).all())
+        common = week.from_bytes(masks.get(swap_request.sender_id)) & week.from_bytes(masks.get(swap_request.receiver_id))
+
+        slots = week.suggest_slots(common, duration, after, count, days)
+        return {
+            "slots": [{"start": start.isoformat(), "end": end.isoformat()} for start, end in slots],
+            "overlapMinutesPerWeek": common.bit_count() * week.SLOT_MINUTES
+        }, 200
+
+
+# Media Endpoints
+class GetProfilePhoto(Resource):
+    def get(self, filename):
+        return send_profile_photo(filename)
+
+
+# Match Endpoints
+class GetMatches(Resource):
+    @jwt_required()
+    def get(self):
+        current_user_id = int(get_jwt_identity())
+        limit = parse_limit(
+            request.args.get("limit"),
+            app.config["USERS_PAGE_LIMIT"],
+            app.config["USERS_PAGE_MAX_LIMIT"]
+        )
+
+        try:
+            min_overlap = parse_min_overlap()
+        except ValueError:
+            return {"message": "min_overlap must be a number of minutes"}, 400
+
+        # The index covers private profiles too, so over-fetch before filtering them out
+        ranked = skill_matches.matches(current_user_id, limit * (app.config["AVAILABILITY_FILTER_POOL"] if min_overlap else 2))
+        overlaps = None
+        if min_overlap:
+            overlaps = availability_overlaps(current_user_id, [user_id for user_id, _, _ in ranked], min_overlap)
+            ranked = [match for match in ranked if match[0] in overlaps][:limit]
+        if not ranked:
+            return {"matches": []}, 200
+
+        users = db.session.scalars(
+            select(User)
+            .filter(User.id.in_([user_id for user_id, _, _ in ranked]), User.is_public == True)
+            .options(selectinload(User.skills_offered), selectinload(User.skills_wanted), selectinload(User.rating_summary))
+        ).all()
+        users_by_id = {user.id: user for user in users}
+
+        matches = []
+        for user_id, they_offer, they_want in ranked:
+            if user_id not in users_by_id:
+                continue
+            match = {
+                "user": users_by_id[user_id].to_dict(photo_variant="thumb"),
+                "theyOffer": they_offer,
+                "theyWant": they_want,
+                "score": len(they_offer) * len(they_want)
+            }
+            if overlaps is not None:
+                match["overlapMinutes"] = overlaps[user_id]
+            matches.append(match)
+        return {"matches": matches[:limit]}, 200
+
+
 # Feedback Endpoints
 class GetUserFeedback(Resource):
+    @read_from_replica
     def get(self, user_id):
-        user = db.session.scalars(select(User).filter_by(uuid=user_id)).first()
-        if not user:
+        user_pk = lookup_user_id(user_id)
+        if user_pk is None:
             return {"message": "User not found"}, 404
         
-        feedback = db.session.scalars(
-            select(Feedback)
-            .filter_by(to_user_id=user.id)
-            .options(selectinload(Feedback.from_user), selectinload(Feedback.swap_request))
-        ).all()
-        
-        return {"feedback": [f.to_dict() for f in feedback]}, 200
+        def build_feedback():
+            feedback = db.session.scalars(
+                select(Feedback)
+                .filter_by(to_user_id=user_pk)
+                .options(selectinload(Feedback.from_user), selectinload(Feedback.swap_request))
+            ).all()
+            return {"feedback": [f.to_dict() for f in feedback]}
+
+        return conditional_view(f"feedback:{user_pk}", [f"users:{user_pk}:feedbacks"], build_feedback)
+
+
+class GetTopRatedUsers(Resource):
+    def get(self):
+        limit = parse_limit(
+            request.args.get("limit"),
+            app.config["USERS_PAGE_LIMIT"],
+            app.config["USERS_PAGE_MAX_LIMIT"]
+        )
+        min_count = parse_limit(request.args.get("min_count"), app.config["TOP_RATED_MIN_COUNT"], 1000)
+
+        def build_leaderboard():
+            # Walk ix_user_ratings_mean_count in leaderboard order and stop at
+            # limit; checking is_public per row keeps users from driving the
+            # plan, which would sort every public user's rating
+            ranked = db.session.scalars(
+                select(UserRating.user_id)
+                .filter(
+                    UserRating.count >= min_count,
+                    select(User.id).filter(User.id == UserRating.user_id, User.is_public == True).exists()
+                )
+                .order_by(UserRating.mean.desc(), UserRating.count.desc())
+                .limit(limit)
+            ).all()
+            if not ranked:
+                return {"users": []}
+            order = {user_id: position for position, user_id in enumerate(ranked)}
+            users = db.session.scalars(
+                select(User)
+                .filter(User.id.in_(order))
+                .options(selectinload(User.skills_offered), selectinload(User.skills_wanted), selectinload(User.rating_summary))
+            ).all()
+            users.sort(key=lambda user: order[user.id])
+            return {"users": [user.to_dict(photo_variant="thumb") for user in users]}
+
+        leaderboard = cached_view(f"top_rated:{min_count}:{limit}", ["users", "feedbacks"], build_leaderboard)
+        return leaderboard, 200
+
+
+def record_rating(user_id, rating):
+    """Fold one rating into the user's summary row, in the caller's transaction"""
+    stars = f"stars_{rating}"
+    # The first rating creates the row; concurrent first ratings fold into whichever insert lands first
+    db.session.execute(
+        upsert(UserRating, ["user_id"], [
+            # mean goes first: MySQL evaluates SET clauses left to right against updated values
+            ("mean", (UserRating.total + rating) * 1.0 / (UserRating.count + 1)),
+            ("count", UserRating.count + 1),
+            ("total", UserRating.total + rating),
+            (stars, getattr(UserRating, stars) + 1)
+        ]).values(user_id=user_id, count=1, total=rating, mean=float(rating), **{
+            f"stars_{n}": int(n == rating) for n in range(1, 6)
+        })
+    )
 
 
 class AddFeedback(Resource):
+    schema = Schema(
+        swapRequestId=Field(str, required=True),
+        toUserId=Field(str, required=True),
+        rating=Field(int, required=True),
+        comment=Field(str)
+    )
+
     @jwt_required()
     def post(self):
-        current_user_id = get_jwt_identity()
-        
-        parser = reqparse.RequestParser()
-        parser.add_argument("swapRequestId", type=str, required=True)
-        parser.add_argument("toUserId", type=str, required=True)
-        parser.add_argument("rating", type=int, required=True)
-        parser.add_argument("comment", type=str)
-        data = parser.parse_args()
+        current_user_id = int(get_jwt_identity())
+        data = self.schema.parse()
         
         # Get swap request and to_user by UUID
         swap_request = db.session.scalars(
@@ -555,6 +1070,9 @@ class AddFeedback(Resource):
         
         if not swap_request or not to_user:
             return {"message": "Swap request or user not found"}, 404
+
+        if not 1 <= data["rating"] <= 5:
+            return {"message": "Rating must be between 1 and 5"}, 400
         
         # Verify user is part of the swap request
         if swap_request.sender_id != current_user_id and swap_request.receiver_id != current_user_id:
@@ -570,6 +1088,7 @@ class AddFeedback(Resource):
         
         try:
             db.session.add(feedback)
+            record_rating(to_user.id, data["rating"])
             db.session.commit()
             return {"feedback": feedback.to_dict()}, 201
         except Exception as e:
@@ -577,6 +1096,51 @@ class AddFeedback(Resource):
             return {"message": "Failed to add feedback"}, 500
 
 
+# Event Stream Endpoints
+class EventStream(Resource):
+    """Server-sent events for changes to the user's swap requests and received feedback.
+
+    A "ready" event follows the subscription, after which the client syncs
+    with GET /api/swap-requests?updated_since=..., so nothing committed in
+    between is missed; it syncs the same way on "resync". EventSource
+    cannot set headers, so the token may also be passed as ?jwt=.
+    """
+
+    @jwt_required(locations=["headers", "query_string"])
+    def get(self):
+        claims = get_jwt()
+        subscription = event_broker.subscribe(int(claims["sub"]))
+        if subscription is None:
+            return {"message": "Too many open streams, please try again shortly"}, 503, {"Retry-After": "30"}
+
+        def stream():
+            yield "retry: 3000\nevent: ready\ndata: {}\n\n"
+            # End with the token, so an expired or revoked one stops receiving events
+            while time.time() < claims["exp"] and not token_revocations.is_revoked(claims["jti"]):
+                items = subscription.pull(app.config["EVENTS_HEARTBEAT_SECONDS"])
+                if not items:
+                    yield ": keep-alive\n\n"
+                for name, data in items:
+                    yield f"event: {name}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+        response = Response(
+            stream_with_context(stream()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+        response.call_on_close(lambda: event_broker.unsubscribe(subscription))
+        return response
+
+
+# Monitoring Endpoints
+class Metrics(Resource):
+    def get(self):
+        token = app.config["METRICS_TOKEN"]
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            return {"message": "Unauthorized"}, 401
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
 # Authentication
 api.add_resource(RegisterUser, "/api/auth/register")
 api.add_resource(LoginUser, "/api/auth/login")
@@ -587,6 +1151,7 @@ api.add_resource(GetCurrentUser, "/api/auth/me")
 api.add_resource(GetAllUsers, "/api/users")
 api.add_resource(GetUserById, "/api/users/<string:user_id>")
 api.add_resource(SearchUsers, "/api/users/search")
+api.add_resource(GetTopRatedUsers, "/api/users/top-rated")
 api.add_resource(UpdateUserProfile, "/api/users/profile")
 api.add_resource(UpdateUserAvailability, "/api/users/availability")
 api.add_resource(TogglePublicProfile, "/api/users/toggle-public")
@@ -596,16 +1161,30 @@ api.add_resource(AddSkillOffered, "/api/skills/offered")
 api.add_resource(AddSkillWanted, "/api/skills/wanted")
 api.add_resource(RemoveSkillOffered, "/api/skills/offered/<string:skill_id>")
 api.add_resource(RemoveSkillWanted, "/api/skills/wanted/<string:skill_id>")
+api.add_resource(BatchUpdateSkills, "/api/skills/batch")
 
 # Swap Requests
 api.add_resource(GetSwapRequests, "/api/swap-requests")
 api.add_resource(CreateSwapRequest, "/api/swap-requests")
 api.add_resource(UpdateSwapRequestStatus, "/api/swap-requests/<string:request_id>/status")
 api.add_resource(DeleteSwapRequest, "/api/swap-requests/<string:request_id>")
+api.add_resource(SuggestSwapSlots, "/api/swap-requests/<string:request_id>/slots")
+
+# Media
+api.add_resource(GetProfilePhoto, "/static/uploads/profile_photos/<path:filename>")
+
+# Matches
+api.add_resource(GetMatches, "/api/matches")
 
 # Feedback
 api.add_resource(GetUserFeedback, "/api/feedback/user/<string:user_id>")
 api.add_resource(AddFeedback, "/api/feedback")
 
+# Events
+api.add_resource(EventStream, "/api/stream")
+
+# Monitoring
+api.add_resource(Metrics, "/metrics")
+
 if __name__ == "__main__":
     app.run()
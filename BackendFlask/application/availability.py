@@ -0,0 +1,116 @@
+from application.pagination import IST
+from datetime import timedelta
+import math
+
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# A week of availability is one bit per 15-minute slot, Monday 00:00 IST first
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WEEK_SLOTS = 7 * SLOTS_PER_DAY
+WEEK_MASK = (1 << WEEK_SLOTS) - 1
+MASK_BYTES = WEEK_SLOTS // 8
+
+
+def parse_time(value):
+    """Minutes since midnight for "HH:MM", allowing "24:00" as the end of the day"""
+    hours, minutes = value.split(":")
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours <= 24 and 0 <= minutes < 60) or (hours == 24 and minutes):
+        raise ValueError(f"Invalid time {value!r}")
+    return hours * 60 + minutes
+
+
+def week_mask(slots):
+    """Compile [{day, startTime, endTime}, ...] into a week bitmap.
+
+    Only slots covered from start to end count, so ranges are narrowed to
+    whole slots. A range ending at or before its start runs past midnight
+    into the next day, and Sunday night wraps into Monday. Raises
+    ValueError on a malformed entry.
+    """
+    mask = 0
+    for slot in slots:
+        try:
+            day = DAYS.index(slot["day"])
+            start, end = parse_time(slot["startTime"]), parse_time(slot["endTime"])
+        except (TypeError, KeyError, AttributeError, ValueError):
+            raise ValueError(f"Invalid availability entry {slot!r}")
+        if end <= start:
+            end += 24 * 60
+        first = day * SLOTS_PER_DAY + math.ceil(start / SLOT_MINUTES)
+        last = day * SLOTS_PER_DAY + end // SLOT_MINUTES
+        if last > first:
+            bits = ((1 << (last - first)) - 1) << first
+            mask |= (bits & WEEK_MASK) | (bits >> WEEK_SLOTS)
+    return mask
+
+
+def to_bytes(mask):
+    return mask.to_bytes(MASK_BYTES, "little")
+
+
+def from_bytes(data):
+    return int.from_bytes(data, "little") if data else 0
+
+
+def overlap_minutes(a, b):
+    return (a & b).bit_count() * SLOT_MINUTES
+
+
+def rotate(mask, slots):
+    """Rotate the week so bit n of the result is bit n + slots of mask"""
+    slots %= WEEK_SLOTS
+    return ((mask >> slots) | (mask << (WEEK_SLOTS - slots))) & WEEK_MASK
+
+
+def run_starts(mask, length):
+    """Slots that begin `length` consecutive free slots, found by ANDing shifted copies of the week"""
+    starts = mask
+    span = 1
+    # Doubling: after each step, starts marks runs of 2 * span slots
+    while span * 2 <= length:
+        starts &= rotate(starts, span)
+        span *= 2
+    if span < length:
+        starts &= rotate(starts, length - span)
+    return starts
+
+
+def slot_of(moment):
+    moment = moment.astimezone(IST)
+    return moment.weekday() * SLOTS_PER_DAY + (moment.hour * 60 + moment.minute) // SLOT_MINUTES
+
+
+def suggest_slots(mask, duration, after, count, days):
+    """Return up to count (start, end) IST datetimes in the next `days` days that mask keeps free for duration minutes.
+
+    Suggestions do not overlap and are returned earliest first.
+    """
+    length = max(1, math.ceil(duration / SLOT_MINUTES))
+    if length > WEEK_SLOTS:
+        return []
+    starts = run_starts(mask, length)
+    if not starts:
+        return []
+
+    # Lay the weeks out end to end, starting at the first whole slot after `after`
+    after = after.astimezone(IST)
+    first = after.replace(second=0, microsecond=0) + timedelta(minutes=-after.minute % SLOT_MINUTES)
+    if first < after:
+        first += timedelta(minutes=SLOT_MINUTES)
+    horizon = days * SLOTS_PER_DAY
+    week = rotate(starts, slot_of(first))
+    timeline = 0
+    for n in range(math.ceil(horizon / WEEK_SLOTS)):
+        timeline |= week << (n * WEEK_SLOTS)
+    timeline &= (1 << horizon) - 1
+
+    suggestions = []
+    while timeline and len(suggestions) < count:
+        offset = (timeline & -timeline).bit_length() - 1
+        start = first + timedelta(minutes=offset * SLOT_MINUTES)
+        suggestions.append((start, start + timedelta(minutes=duration)))
+        timeline &= ~((1 << (offset + length)) - 1)
+    return suggestions
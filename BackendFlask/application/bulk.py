@@ -0,0 +1,370 @@
+from app import db
+from application import availability as week
+from application import geo
+from application.caching import invalidate
+from application.hashing import password_hasher
+from application.indexing import _indexes
+from application.models import User, Skill, SkillWanted, SkillTerm, SwapRequest, now_ist
+from application.pagination import parse_timestamp
+from sqlalchemy import insert, or_, select
+from sqlalchemy.orm import aliased
+import csv
+import json
+
+
+# Stored for imported members who arrive without credentials; never verifies,
+# so they have to go through a password reset before they can log in
+UNUSABLE_PASSWORD = "!"
+
+LEVELS = {"beginner", "intermediate", "advanced", "expert"}
+USER_STATUSES = {"pending", "verified", "blocked"}
+SWAP_STATUSES = {"pending", "accepted", "rejected", "completed"}
+
+USER_FIELDS = ["email", "name", "location", "isPublic", "availability", "status", "createdAt"]
+SKILL_FIELDS = ["email", "kind", "name", "description", "category", "level", "createdAt"]
+SWAP_FIELDS = [
+    "senderEmail", "receiverEmail", "skillOffered", "skillRequested", "status",
+    "proposedDate", "meetingLocation", "notes", "createdAt", "updatedAt"
+]
+
+
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def after_bulk_write(tags):
+    """Core inserts bypass the flush events that keep cached views and skill indexes current.
+
+    tags should name the tables written and the user-scoped tags of every
+    user touched, as DEPENDENCY_TAGS would for the same rows.
+    """
+    invalidate(tags)
+    for index in _indexes:
+        index.invalidate()
+
+
+def read_records(stream, fmt):
+    """Yield one dict per JSONL line or CSV row, without reading the whole file"""
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def write_records(stream, fmt, fields, records):
+    """Write records as JSONL or CSV; nested values become JSON strings in CSV"""
+    count = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(stream, fieldnames=fields)
+        writer.writeheader()
+        for record in records:
+            writer.writerow({k: json.dumps(v) if isinstance(v, (dict, list)) else v for k, v in record.items()})
+            count += 1
+    else:
+        for record in records:
+            stream.write(json.dumps(record) + "\n")
+            count += 1
+    return count
+
+
+def json_field(value):
+    # CSV cells carry nested values as JSON text
+    if isinstance(value, str):
+        return json.loads(value) if value.strip() else None
+    return value
+
+
+def bool_field(value, default):
+    if value is None or value == "":
+        return default
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "y")
+    return bool(value)
+
+
+def time_field(value, default=None):
+    return parse_timestamp(value) if value else default
+
+
+def iso(value):
+    return value.isoformat() if value else None
+
+
+def skill_field(value):
+    value = json_field(value) if isinstance(value, str) and value.lstrip().startswith("{") else value
+    return value if isinstance(value, dict) else {"name": value}
+
+
+def emails_to_ids(emails):
+    if not emails:
+        return {}
+    return dict(db.session.execute(select(User.email, User.id).where(User.email.in_(emails))).all())
+
+
+def skill_row(user_id, record, kind, now):
+    level = record.get("level") if kind == "offered" else record.get("levelNeeded", record.get("level"))
+    row = {
+        "user_id": user_id,
+        "name": record["name"].strip(),
+        "description": record.get("description") or None,
+        "category": record.get("category") or None,
+        "created_at": time_field(record.get("createdAt"), now),
+    }
+    row["level" if kind == "offered" else "level_needed"] = level if level in LEVELS else None
+    return row
+
+
+def insert_skills(rows_by_kind):
+    for kind, model in (("offered", Skill), ("wanted", SkillWanted)):
+        if rows_by_kind[kind]:
+            db.session.execute(insert(model), SkillTerm.assign(rows_by_kind[kind]))
+    return sum(len(rows) for rows in rows_by_kind.values())
+
+
+def import_users(records, chunk_size=5000, log=print):
+    """Insert users chunk by chunk, skipping emails that already exist.
+
+    Records may carry skillsOffered and skillsWanted lists, in the shape
+    init_db uses, which are inserted for newly created users only. A
+    passwordHash is stored as is; plain passwords are hashed on the way in,
+    a chunk at a time across the password hashing pool.
+    """
+    stats = {"created": 0, "existing": 0, "invalid": 0, "skills": 0}
+    touched = set()
+    for chunk in chunked(records, chunk_size):
+        now = now_ist().replace(tzinfo=None)
+        by_email = {}
+        for record in chunk:
+            email = (record.get("email") or "").strip()
+            try:
+                slots = json_field(record.get("availability")) or []
+                record = {**record, "availability": slots, "availabilityMask": week.week_mask(slots)}
+            except ValueError:
+                record = None
+            if record is None or not email or not (record.get("name") or "").strip():
+                stats["invalid"] += 1
+            elif email in by_email:
+                stats["existing"] += 1
+            else:
+                by_email[email] = record
+
+        existing = set(db.session.scalars(select(User.email).where(User.email.in_(by_email))))
+        stats["existing"] += len(existing)
+        new = [(email, record) for email, record in by_email.items() if email not in existing]
+        if not new:
+            continue
+
+        plain = [record["password"] for _, record in new if not record.get("passwordHash") and record.get("password")]
+        hashed = iter(password_hasher.hash_many(plain))
+        rows = []
+        for email, record in new:
+            if record.get("passwordHash"):
+                password_hashed = record["passwordHash"]
+            elif record.get("password"):
+                password_hashed = next(hashed)
+            else:
+                password_hashed = UNUSABLE_PASSWORD
+            status = record.get("status")
+            rows.append({
+                "name": record["name"].strip(),
+                "email": email,
+                "password_hashed": password_hashed,
+                "location": record.get("location") or None,
+                **geo.locate(record.get("location")),
+                "is_public": bool_field(record.get("isPublic"), True),
+                "availability": record["availability"],
+                "availability_mask": week.to_bytes(record["availabilityMask"]),
+                "role": "user",
+                "status": status if status in USER_STATUSES else "verified",
+                "created_at": time_field(record.get("createdAt"), now),
+            })
+        ids = db.session.scalars(insert(User).returning(User.id, sort_by_parameter_order=True), rows).all()
+
+        skills = {"offered": [], "wanted": []}
+        for user_id, (_, record) in zip(ids, new):
+            for kind, key in (("offered", "skillsOffered"), ("wanted", "skillsWanted")):
+                for skill in json_field(record.get(key)) or []:
+                    if (skill.get("name") or "").strip():
+                        skills[kind].append(skill_row(user_id, skill, kind, now))
+        stats["skills"] += insert_skills(skills)
+
+        db.session.commit()
+        touched.update(ids)
+        stats["created"] += len(ids)
+        log(f"users: {stats['created']} created, {stats['existing']} existing, {stats['invalid']} invalid")
+
+    after_bulk_write({"users", "skills", "skills_wanted", *(f"users:{user_id}" for user_id in touched)})
+    return stats
+
+
+def import_skills(records, chunk_size=5000, log=print):
+    """Insert offered and wanted skills, attached to their owners by email.
+
+    A skill the owner already lists under the same kind and name is skipped,
+    so re-running an import is harmless.
+    """
+    stats = {"created": 0, "existing": 0, "unknown_user": 0, "invalid": 0}
+    touched = set()
+    for chunk in chunked(records, chunk_size):
+        now = now_ist().replace(tzinfo=None)
+        user_ids = emails_to_ids({(record.get("email") or "").strip() for record in chunk})
+        seen = {
+            kind: set(db.session.execute(
+                select(model.user_id, model.name).where(model.user_id.in_(user_ids.values()))
+            ).tuples())
+            for kind, model in (("offered", Skill), ("wanted", SkillWanted))
+        }
+        skills = {"offered": [], "wanted": []}
+        for record in chunk:
+            kind = (record.get("kind") or "offered").strip()
+            user_id = user_ids.get((record.get("email") or "").strip())
+            if kind not in skills or not (record.get("name") or "").strip():
+                stats["invalid"] += 1
+            elif user_id is None:
+                stats["unknown_user"] += 1
+            elif (user_id, record["name"].strip()) in seen[kind]:
+                stats["existing"] += 1
+            else:
+                seen[kind].add((user_id, record["name"].strip()))
+                skills[kind].append(skill_row(user_id, record, kind, now))
+        stats["created"] += insert_skills(skills)
+        db.session.commit()
+        touched.update(row["user_id"] for rows in skills.values() for row in rows)
+        log(f"skills: {stats['created']} created, {stats['existing']} existing, {stats['unknown_user']} unknown users, {stats['invalid']} invalid")
+
+    after_bulk_write({"skills", "skills_wanted", *(f"users:{user_id}" for user_id in touched)})
+    return stats
+
+
+def import_swaps(records, chunk_size=5000, log=print):
+    """Insert swap requests between users identified by email"""
+    stats = {"created": 0, "unknown_user": 0, "invalid": 0}
+    touched = set()
+    for chunk in chunked(records, chunk_size):
+        now = now_ist().replace(tzinfo=None)
+        emails = set()
+        for record in chunk:
+            emails.update(((record.get("senderEmail") or "").strip(), (record.get("receiverEmail") or "").strip()))
+        user_ids = emails_to_ids(emails)
+
+        rows = []
+        for record in chunk:
+            sender_id = user_ids.get((record.get("senderEmail") or "").strip())
+            receiver_id = user_ids.get((record.get("receiverEmail") or "").strip())
+            status = record.get("status") or "pending"
+            if not record.get("skillOffered") or not record.get("skillRequested") or status not in SWAP_STATUSES:
+                stats["invalid"] += 1
+            elif sender_id is None or receiver_id is None or sender_id == receiver_id:
+                stats["unknown_user"] += 1
+            else:
+                created = time_field(record.get("createdAt"), now)
+                rows.append({
+                    "sender_id": sender_id,
+                    "receiver_id": receiver_id,
+                    "skill_offered": skill_field(record["skillOffered"]),
+                    "skill_requested": skill_field(record["skillRequested"]),
+                    "status": status,
+                    "proposed_date": time_field(record.get("proposedDate")),
+                    "meeting_location": record.get("meetingLocation") or None,
+                    "notes": record.get("notes") or None,
+                    "created_at": created,
+                    "updated_at": time_field(record.get("updatedAt"), created),
+                })
+        if rows:
+            db.session.execute(insert(SwapRequest), rows)
+        db.session.commit()
+        touched.update(user_id for row in rows for user_id in (row["sender_id"], row["receiver_id"]))
+        stats["created"] += len(rows)
+        log(f"swap_requests: {stats['created']} created, {stats['unknown_user']} unknown users, {stats['invalid']} invalid")
+
+    after_bulk_write({"swap_requests", *(f"users:{user_id}:swap_requests" for user_id in touched)})
+    return stats
+
+
+def stream(statement, chunk_size):
+    return db.session.execute(statement.execution_options(yield_per=chunk_size))
+
+
+def export_users(chunk_size=5000, include_password_hashes=False):
+    """Yield user records in id order, chunk_size rows in memory at a time"""
+    columns = [User.email, User.name, User.location, User.is_public, User.availability, User.status, User.created_at]
+    if include_password_hashes:
+        columns.append(User.password_hashed)
+    for row in stream(select(*columns).where(or_(User.role.is_(None), User.role != "admin")).order_by(User.id), chunk_size):
+        record = {
+            "email": row.email,
+            "name": row.name,
+            "location": row.location,
+            "isPublic": row.is_public,
+            "availability": row.availability or [],
+            "status": row.status,
+            "createdAt": iso(row.created_at),
+        }
+        if include_password_hashes:
+            record["passwordHash"] = row.password_hashed
+        yield record
+
+
+def export_skills(chunk_size=5000):
+    """Yield offered then wanted skills with their owner's email"""
+    for kind, model, level in (("offered", Skill, Skill.level), ("wanted", SkillWanted, SkillWanted.level_needed)):
+        statement = (
+            select(User.email, model.name, model.description, model.category, level.label("level"), model.created_at)
+            .join(User, User.id == model.user_id)
+            .order_by(model.id)
+        )
+        for row in stream(statement, chunk_size):
+            yield {
+                "email": row.email,
+                "kind": kind,
+                "name": row.name,
+                "description": row.description,
+                "category": row.category,
+                "level": row.level,
+                "createdAt": iso(row.created_at),
+            }
+
+
+def export_swaps(chunk_size=5000):
+    """Yield swap requests with sender and receiver emails"""
+    sender, receiver = aliased(User), aliased(User)
+    statement = (
+        select(
+            sender.email.label("sender_email"), receiver.email.label("receiver_email"),
+            SwapRequest.skill_offered, SwapRequest.skill_requested, SwapRequest.status, SwapRequest.proposed_date,
+            SwapRequest.meeting_location, SwapRequest.notes, SwapRequest.created_at, SwapRequest.updated_at
+        )
+        .join(sender, sender.id == SwapRequest.sender_id)
+        .join(receiver, receiver.id == SwapRequest.receiver_id)
+        .order_by(SwapRequest.id)
+    )
+    for row in stream(statement, chunk_size):
+        yield {
+            "senderEmail": row.sender_email,
+            "receiverEmail": row.receiver_email,
+            "skillOffered": row.skill_offered,
+            "skillRequested": row.skill_requested,
+            "status": row.status,
+            "proposedDate": iso(row.proposed_date),
+            "meetingLocation": row.meeting_location,
+            "notes": row.notes,
+            "createdAt": iso(row.created_at),
+            "updatedAt": iso(row.updated_at),
+        }
+
+
+IMPORTERS = {"users": import_users, "skills": import_skills, "swaps": import_swaps}
+EXPORTS = {
+    "users": (USER_FIELDS, export_users),
+    "skills": (SKILL_FIELDS, export_skills),
+    "swaps": (SWAP_FIELDS, export_swaps),
+}
@@ -0,0 +1,214 @@
+from app import app, cache
+from cachelib import BaseCache, SimpleCache
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from application.models import User, Skill, SkillWanted, SwapRequest, Feedback
+from application.metrics import cache_requests
+from application.routing import replica_reads
+from hashlib import blake2b
+from uuid import uuid4
+import threading
+
+
+# Dependency tags touched by a change to each model. A table tag covers
+# views over the whole table, the user-scoped tags cover one user's data.
+DEPENDENCY_TAGS = {
+    User: lambda user: {"users", f"users:{user.id}"},
+    Skill: lambda skill: {"skills", f"users:{skill.user_id}"},
+    SkillWanted: lambda skill: {"skills_wanted", f"users:{skill.user_id}"},
+    SwapRequest: lambda swap: {
+        "swap_requests",
+        f"users:{swap.sender_id}:swap_requests",
+        f"users:{swap.receiver_id}:swap_requests"
+    },
+    # Feedback also moves the rating summary shown on profiles and directory cards
+    Feedback: lambda feedback: {
+        "feedbacks",
+        "users",
+        f"users:{feedback.to_user_id}",
+        f"users:{feedback.to_user_id}:feedbacks"
+    },
+}
+
+
+# A tag reads as version 0 until its first invalidation, and again in a
+# fresh or flushed cache; the epoch tells those apart from the versions
+# clients may still hold in ETags
+EPOCH_KEY = "cache_epoch"
+
+
+def tag_key(tag):
+    return f"cache_tag:{tag}"
+
+
+_counter_lock = threading.Lock()
+
+
+def increment(key, timeout=None):
+    """Add one to a counter and return it, keeping it for timeout seconds, CACHE_VERSION_TIMEOUT by default.
+
+    Backends without a native increment emulate it with a get and a set
+    at the default timeout, so a counter would quietly restart from zero;
+    here the set carries our timeout instead. Native increments (Redis
+    INCR) keep the expiry the counter was created with.
+    """
+    if timeout is None:
+        timeout = app.config["CACHE_VERSION_TIMEOUT"]
+    backend = cache.cache
+    if type(backend).inc in (BaseCache.inc, SimpleCache.inc):
+        with _counter_lock:
+            value = (cache.get(key) or 0) + 1
+            cache.set(key, value, timeout=timeout)
+        return value
+    cache.add(key, 0, timeout=timeout)
+    return backend.inc(key)
+
+
+def invalidate(tags):
+    """Give each tag a fresh random version.
+
+    Versions expire after CACHE_VERSION_TIMEOUT rather than never, since
+    SimpleCache evicts never-expiring keys first. A counter that expired
+    would count back up through versions still cached; random versions
+    never repeat, and each invalidation pushes the expiry out again.
+    """
+    if tags:
+        cache.set_many({tag_key(tag): uuid4().hex[:8] for tag in tags}, timeout=app.config["CACHE_VERSION_TIMEOUT"])
+
+
+def current_epoch(epoch):
+    """Return the epoch read alongside the tag versions, starting a new one if it is missing"""
+    if epoch is None:
+        cache.add(EPOCH_KEY, uuid4().hex[:8], timeout=app.config["CACHE_VERSION_TIMEOUT"])
+        epoch = cache.get(EPOCH_KEY)
+    return epoch
+
+
+def build_with_timeout(build, timeout=None):
+    """Run build() and pick how long to cache its result.
+
+    A build that read from the replica may predate writes that already
+    bumped our tags, so it is only kept for the replica's lag bound.
+    Returns (value, timeout, settled), settled being False in that case.
+    """
+    reads = replica_reads()
+    value = build()
+    if replica_reads() != reads:
+        return value, app.config["DB_REPLICA_MAX_LAG"], False
+    return value, timeout or app.config["CACHE_VIEW_TIMEOUT"], True
+
+
+def view_version(key, tags):
+    """key qualified by the cache epoch and the current version of every tag, in one round trip"""
+    tags = sorted(tags)
+    epoch, *versions = cache.get_many(EPOCH_KEY, *[tag_key(tag) for tag in tags])
+    return f"{key}@{current_epoch(epoch)}:{'.'.join(str(version or 0) for version in versions)}"
+
+
+def cached_version(version, build, timeout=None):
+    """Return (value, settled) for a key from view_version, building and storing it on a miss"""
+    entry = cache.get(version)
+    cache_requests.inc(("view", "miss" if entry is None else "hit"))
+    if entry is None:
+        value, timeout, settled = build_with_timeout(build, timeout)
+        entry = {"data": value, "settled": settled}
+        cache.set(version, entry, timeout=timeout)
+    return entry["data"], entry["settled"]
+
+
+def cached_view(key, tags, build, timeout=None):
+    """Return the cached value of build() for key, rebuilt whenever any of tags is invalidated.
+
+    The current version of every tag is folded into the cache key, so a
+    commit touching a dependency makes the old entry unreachable and it
+    simply expires; entries can therefore live for a long time.
+    """
+    return cached_version(view_version(key, tags), build, timeout)[0]
+
+
+def conditional_view(key, tags, build, timeout=None, store=True):
+    """Like cached_view, but as a response tuple carrying an ETag derived from the view's version.
+
+    A client whose If-None-Match still matches gets an empty 304 before
+    anything is built or serialized. Results read from a lagging replica
+    get no ETag, since they may be older than the version it would name.
+    With store=False the result is rebuilt each time and only the ETag
+    is versioned, for views whose keys are too varied to be worth caching.
+    """
+    version = view_version(key, tags)
+    etag = blake2b(version.encode(), digest_size=12).hexdigest()
+    headers = {"ETag": f'W/"{etag}"', "Cache-Control": "no-cache"}
+    if request.if_none_match.contains_weak(etag):
+        return "", 304, headers
+
+    if store:
+        value, settled = cached_version(version, build, timeout)
+    else:
+        value, _, settled = build_with_timeout(build, timeout)
+    if not settled:
+        return value, 200
+    return value, 200, headers
+
+
+def cached_profile(user_id, build, timeout=None):
+    """Return a user's serialized profile, rebuilding it only when the epoch or the user's tag has moved on.
+
+    The entry, the epoch and the user's tag version are fetched together, so an
+    unchanged profile costs a single cache round trip. build() may return
+    None for a missing user, which is not cached.
+    """
+    entry_key = f"profile:{user_id}"
+    entry, epoch, version = cache.get_many(entry_key, EPOCH_KEY, tag_key(f"users:{user_id}"))
+    version = f"{current_epoch(epoch)}:{version or 0}"
+    if entry is not None and entry["version"] == version:
+        cache_requests.inc(("profile", "hit"))
+        return entry["data"]
+    cache_requests.inc(("profile", "miss"))
+    data, timeout, _ = build_with_timeout(build, timeout)
+    if data is not None:
+        cache.set(entry_key, {"version": version, "data": data}, timeout=timeout)
+    return data
+
+
+_user_ids = {}
+
+
+def resolve_user_id(user_uuid, load):
+    """Map a public user uuid to its primary key, remembering hits since the pair never changes"""
+    user_id = _user_ids.get(user_uuid)
+    if user_id is None:
+        user_id = load(user_uuid)
+        if user_id is not None:
+            if len(_user_ids) >= app.config["USER_ID_MEMO_SIZE"]:
+                _user_ids.clear()
+            _user_ids[user_uuid] = user_id
+    return user_id
+
+
+def invalidate_on_commit(session, tags):
+    """Queue tags for writes the unit of work does not see, such as Core bulk statements"""
+    session.info.setdefault("cache_tags", set()).update(tags)
+
+
+@event.listens_for(Session, "after_flush")
+def collect_cache_tags(session, flush_context):
+    tags = session.info.setdefault("cache_tags", set())
+    for obj in session.new | session.deleted:
+        if type(obj) in DEPENDENCY_TAGS:
+            tags |= DEPENDENCY_TAGS[type(obj)](obj)
+    for obj in session.dirty:
+        if type(obj) in DEPENDENCY_TAGS and session.is_modified(obj):
+            tags |= DEPENDENCY_TAGS[type(obj)](obj)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_cache_tags(session):
+    tags = session.info.pop("cache_tags", None)
+    if tags:
+        invalidate(tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_cache_tags(session):
+    session.info.pop("cache_tags", None)
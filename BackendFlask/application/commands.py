@@ -0,0 +1,75 @@
+from app import app, cache
+from application.bulk import IMPORTERS, EXPORTS, read_records, write_records
+from application.synthetic import generate
+from cachelib import SimpleCache
+import click
+
+
+@app.cli.command("seed-synthetic")
+@click.option("--users", default=1000, show_default=True, help="Number of users to create")
+@click.option("--skills-per-user", default=4, show_default=True, help="Mean offered and wanted skills per user")
+@click.option("--swaps", default=5000, show_default=True, help="Number of swap requests to create")
+@click.option("--feedback-ratio", default=0.5, show_default=True, help="Share of completed swaps that get feedback")
+@click.option("--skew", default=1.1, show_default=True, help="Zipf exponent for skill popularity and user activity")
+@click.option("--seed", default=42, show_default=True, help="Random seed, for reproducible datasets")
+@click.option("--chunk-size", default=5000, show_default=True, help="Rows per batched insert")
+def seed_synthetic(users, skills_per_user, swaps, feedback_ratio, skew, seed, chunk_size):
+    """Populate the database with a synthetic, skewed dataset."""
+    generate(
+        users=users,
+        skills_per_user=skills_per_user,
+        swaps=swaps,
+        feedback_ratio=feedback_ratio,
+        skew=skew,
+        seed=seed,
+        chunk_size=chunk_size,
+        log=click.echo
+    )
+
+
+def guess_format(path, fmt):
+    return fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+
+
+@app.cli.command("import-data")
+@click.argument("entity", type=click.Choice(sorted(IMPORTERS)))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(["jsonl", "csv"]), help="Defaults to the file extension")
+@click.option("--chunk-size", default=5000, show_default=True, help="Rows per batched insert")
+@click.option("--local-cache", is_flag=True, help="Import under a process-local cache backend; restart the app afterwards")
+def import_data(entity, path, fmt, chunk_size, local_cache):
+    """Stream users, skills or swaps from a JSONL or CSV file.
+
+    Users are deduplicated by email. Skills and swaps reference users by
+    email, so import users first.
+
+    The import invalidates cached views through the cache backend, which
+    a running app only sees when the backend is shared (Redis, Memcached).
+    Under SimpleCache it refuses unless --local-cache is given, since the
+    app keeps serving stale views until it restarts.
+    """
+    if isinstance(cache.cache, SimpleCache) and not local_cache:
+        raise click.UsageError(
+            "CACHE_TYPE is process-local, so a running app would not see this import's invalidations; "
+            "point CACHE_TYPE at the app's shared cache, or pass --local-cache and restart the app afterwards"
+        )
+    with open(path, newline="", encoding="utf-8") as f:
+        stats = IMPORTERS[entity](read_records(f, guess_format(path, fmt)), chunk_size=chunk_size, log=click.echo)
+    click.echo(", ".join(f"{key}: {value}" for key, value in stats.items()))
+
+
+@app.cli.command("export-data")
+@click.argument("entity", type=click.Choice(sorted(EXPORTS)))
+@click.argument("path", type=click.Path(dir_okay=False, writable=True))
+@click.option("--format", "fmt", type=click.Choice(["jsonl", "csv"]), help="Defaults to the file extension")
+@click.option("--chunk-size", default=5000, show_default=True, help="Rows fetched per round trip")
+@click.option("--include-password-hashes", is_flag=True, help="Export users with their password hashes")
+def export_data(entity, path, fmt, chunk_size, include_password_hashes):
+    """Stream users, skills or swaps to a JSONL or CSV file."""
+    fields, export = EXPORTS[entity]
+    options = {"chunk_size": chunk_size}
+    if entity == "users" and include_password_hashes:
+        fields, options["include_password_hashes"] = fields + ["passwordHash"], True
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        count = write_records(f, guess_format(path, fmt), fields, export(**options))
+    click.echo(f"{entity}: {count} exported")
@@ -0,0 +1,45 @@
+from app import app
+from flask import request
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE_TYPES = {"application/json", "text/plain", "text/html", "text/csv"}
+
+ENCODERS = {"gzip": lambda data: gzip.compress(data, compresslevel=app.config["COMPRESSION_GZIP_LEVEL"], mtime=0)}
+if brotli is not None:
+    ENCODERS = {"br": lambda data: brotli.compress(data, quality=app.config["COMPRESSION_BROTLI_QUALITY"]), **ENCODERS}
+
+
+@app.after_request
+def compress_response(response):
+    """Compress text bodies above COMPRESSION_MIN_SIZE with the best encoding the client accepts.
+
+    Brotli is offered only when the brotli package is installed. Files and
+    streamed responses are passed through untouched.
+    """
+    if (
+        response.mimetype not in COMPRESSIBLE_TYPES
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    min_size = app.config["COMPRESSION_MIN_SIZE"]
+    if min_size < 0 or response.content_length is None or response.content_length < min_size:
+        return response
+    encoding = request.accept_encodings.best_match(ENCODERS)
+    if encoding is None:
+        return response
+
+    response.set_data(ENCODERS[encoding](response.get_data()))
+    response.headers["Content-Encoding"] = encoding
+    return response
@@ -12,8 +12,77 @@ class Config:
     SECRET_KEY = getenv("SECRET_KEY")
     SQLALCHEMY_DATABASE_URI = getenv("SQLALCHEMY_DATABASE_URI")
     SQLALCHEMY_TRACK_MODIFICATIONS = getenv("SQLALCHEMY_TRACK_MODIFICATIONS", False)
+    # Only options that are set are passed on, so SQLite keeps its own pool defaults
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        option: cast(getenv(name))
+        for option, name, cast in (
+            ("pool_size", "DB_POOL_SIZE", int),
+            ("max_overflow", "DB_MAX_OVERFLOW", int),
+            ("pool_timeout", "DB_POOL_TIMEOUT", float),
+            ("pool_recycle", "DB_POOL_RECYCLE", int),
+            ("pool_pre_ping", "DB_POOL_PRE_PING", lambda value: value.lower() == "true"),
+        )
+        if getenv(name)
+    }
+    SQLALCHEMY_BINDS = {"replica": getenv("SQLALCHEMY_REPLICA_URI")} if getenv("SQLALCHEMY_REPLICA_URI") else {}
+    DB_REPLICA_MAX_LAG = int(getenv("DB_REPLICA_MAX_LAG", 5))
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=6)
     JWT_SECRET_KEY = getenv("JWT_SECRET_KEY")
+    REVOCATION_SYNC_INTERVAL = float(getenv("REVOCATION_SYNC_INTERVAL", 1))
+    REVOCATION_BUCKET_SECONDS = int(getenv("REVOCATION_BUCKET_SECONDS", 600))
+    REVOCATION_FILTER_CAPACITY = int(getenv("REVOCATION_FILTER_CAPACITY", 100000))
+    REVOCATION_FILTER_ERROR_RATE = float(getenv("REVOCATION_FILTER_ERROR_RATE", 0.001))
     CACHE_TYPE = getenv("CACHE_TYPE", "SimpleCache")
     CACHE_REDIS_HOST = getenv("CACHE_REDIS_HOST")
     CACHE_REDIS_PORT = getenv("CACHE_REDIS_PORT")
+    USERS_PAGE_LIMIT = int(getenv("USERS_PAGE_LIMIT", 50))
+    USERS_PAGE_MAX_LIMIT = int(getenv("USERS_PAGE_MAX_LIMIT", 100))
+    TOP_RATED_MIN_COUNT = int(getenv("TOP_RATED_MIN_COUNT", 3))
+    SWAP_REQUESTS_PAGE_LIMIT = int(getenv("SWAP_REQUESTS_PAGE_LIMIT", 50))
+    SWAP_REQUESTS_PAGE_MAX_LIMIT = int(getenv("SWAP_REQUESTS_PAGE_MAX_LIMIT", 200))
+    SKILL_INDEX_SYNC_INTERVAL = float(getenv("SKILL_INDEX_SYNC_INTERVAL", 5))
+    # Skill changes kept in the cache for other processes' indexes to replay; further behind, they rebuild
+    SKILL_INDEX_LOG_TIMEOUT = int(getenv("SKILL_INDEX_LOG_TIMEOUT", 3600))
+    SKILL_INDEX_MAX_REPLAY = int(getenv("SKILL_INDEX_MAX_REPLAY", 1000))
+    SKILL_BATCH_MAX_ITEMS = int(getenv("SKILL_BATCH_MAX_ITEMS", 100))
+    # Full werkzeug method spec, e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000";
+    # stored hashes with a different spec are upgraded on the next login
+    PASSWORD_HASH_METHOD = getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_HASH_WORKERS = int(getenv("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_QUEUE_DEPTH = int(getenv("PASSWORD_HASH_QUEUE_DEPTH", 16))
+    PASSWORD_HASH_TIMEOUT = float(getenv("PASSWORD_HASH_TIMEOUT", 10))
+    PROFILE_PHOTO_FOLDER = getenv("PROFILE_PHOTO_FOLDER", "static/uploads/profile_photos")
+    PROFILE_PHOTO_MAX_SIZE = int(getenv("PROFILE_PHOTO_MAX_SIZE", 5 * 1024 * 1024))
+    PROFILE_PHOTO_THUMBNAIL_SIZE = int(getenv("PROFILE_PHOTO_THUMBNAIL_SIZE", 128))
+    # Rejects oversized uploads from Content-Length before the body is read
+    MAX_CONTENT_LENGTH = PROFILE_PHOTO_MAX_SIZE + 1024 * 1024
+    MEDIA_CACHE_MAX_AGE = int(getenv("MEDIA_CACHE_MAX_AGE", 365 * 24 * 3600))
+    MEDIA_X_ACCEL_REDIRECT_PREFIX = getenv("MEDIA_X_ACCEL_REDIRECT_PREFIX")
+    USE_X_SENDFILE = getenv("USE_X_SENDFILE", "False").lower() == "true"
+    # Cached views are invalidated on commit, so the timeout only bounds memory
+    CACHE_VIEW_TIMEOUT = int(getenv("CACHE_VIEW_TIMEOUT", 24 * 3600))
+    # Tag versions and the cache epoch must outlive every entry cached under them
+    CACHE_VERSION_TIMEOUT = int(getenv("CACHE_VERSION_TIMEOUT", 7 * 24 * 3600))
+    USER_ID_MEMO_SIZE = int(getenv("USER_ID_MEMO_SIZE", 100000))
+    # Smaller bodies are not worth the CPU; set to -1 to disable compression
+    COMPRESSION_MIN_SIZE = int(getenv("COMPRESSION_MIN_SIZE", 1024))
+    COMPRESSION_GZIP_LEVEL = int(getenv("COMPRESSION_GZIP_LEVEL", 6))
+    COMPRESSION_BROTLI_QUALITY = int(getenv("COMPRESSION_BROTLI_QUALITY", 4))
+    # Token bucket limits as "requests/seconds"; set empty to disable
+    RATE_LIMIT_LOGIN = getenv("RATE_LIMIT_LOGIN", "10/60")
+    RATE_LIMIT_SEARCH = getenv("RATE_LIMIT_SEARCH", "60/60")
+    RATE_LIMIT_USERS = getenv("RATE_LIMIT_USERS", "30/60")
+    # Reverse proxies in front of the app whose X-Forwarded-For entries are trusted; 0 uses the socket peer
+    PROXY_FIX_X_FOR = int(getenv("PROXY_FIX_X_FOR", 0))
+    # Ranked candidates screened per requested result when filtering by shared availability
+    AVAILABILITY_FILTER_POOL = int(getenv("AVAILABILITY_FILTER_POOL", 20))
+    SLOT_SUGGESTION_MAX_DAYS = int(getenv("SLOT_SUGGESTION_MAX_DAYS", 28))
+    # Distance filter on the user list and search, in kilometres
+    NEAR_DEFAULT_RADIUS_KM = float(getenv("NEAR_DEFAULT_RADIUS_KM", 25))
+    NEAR_MAX_RADIUS_KM = float(getenv("NEAR_MAX_RADIUS_KM", 500))
+    # Open /api/stream connections per process, each holding a worker thread
+    EVENTS_MAX_STREAMS = int(getenv("EVENTS_MAX_STREAMS", 100))
+    EVENTS_QUEUE_SIZE = int(getenv("EVENTS_QUEUE_SIZE", 100))
+    EVENTS_HEARTBEAT_SECONDS = int(getenv("EVENTS_HEARTBEAT_SECONDS", 15))
+    SLOW_QUERY_THRESHOLD_MS = float(getenv("SLOW_QUERY_THRESHOLD_MS", 100))
+    METRICS_TOKEN = getenv("METRICS_TOKEN")
@@ -0,0 +1,182 @@
+from app import app, cache
+from collections import defaultdict, deque
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from application.models import SwapRequest, Feedback
+import json
+import threading
+import time
+
+
+CHANNEL = "events"
+
+# Sent to a stream that fell behind or may have missed events; the client
+# catches up with GET /api/swap-requests?updated_since=... as it does on connect
+RESYNC = ("resync", {})
+
+
+def swap_request_event(swap, change):
+    data = {"id": swap.uuid}
+    if change != "deleted":
+        data["status"] = swap.status
+        data["updatedAt"] = swap.updated_at.isoformat() if swap.updated_at else None
+    return {swap.sender_id, swap.receiver_id}, f"swap_request.{change}", data
+
+
+def feedback_event(feedback, change):
+    return {feedback.to_user_id}, f"feedback.{change}", {"id": feedback.uuid, "rating": feedback.rating}
+
+
+# Models whose changes are pushed, mapped to (recipient ids, event name, data)
+EVENT_BUILDERS = {SwapRequest: swap_request_event, Feedback: feedback_event}
+
+
+class Subscription:
+    """Events waiting for one open stream, bounded so a stalled client cannot grow it forever"""
+
+    def __init__(self, user_id, size):
+        self.user_id = user_id
+        self._size = size
+        self._events = deque()
+        self._ready = threading.Condition()
+
+    def push(self, item):
+        with self._ready:
+            if len(self._events) >= self._size:
+                # Too far behind to be worth replaying, have the client resync instead
+                self._events.clear()
+                item = RESYNC
+            self._events.append(item)
+            self._ready.notify()
+
+    def pull(self, timeout):
+        """Return the pending events, waiting up to timeout seconds for the first one"""
+        with self._ready:
+            if not self._events:
+                self._ready.wait(timeout)
+            items = list(self._events)
+            self._events.clear()
+        return items
+
+
+class EventBroker:
+    """Fans committed changes out to the open streams of the users they concern.
+
+    With a Redis cache every process publishes to one pub/sub channel and
+    runs a single listener thread that delivers to its own streams, so
+    events reach users connected to any node. Other backends deliver
+    within the process only, which suits a single node.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+        self._count = 0
+        self._listener = None
+
+    def _redis(self):
+        backend = cache.cache
+        return backend if hasattr(backend, "_write_client") else None
+
+    def subscribe(self, user_id):
+        """Open a subscription for user_id, or return None when the process is at EVENTS_MAX_STREAMS"""
+        backend = self._redis()
+        with self._lock:
+            if self._count >= app.config["EVENTS_MAX_STREAMS"]:
+                return None
+            if backend is not None and self._listener is None:
+                self._listener = threading.Thread(target=self._listen, args=(backend,), name="events", daemon=True)
+                self._listener.start()
+            subscription = Subscription(user_id, app.config["EVENTS_QUEUE_SIZE"])
+            self._subscriptions[user_id].add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions and subscription in subscriptions:
+                subscriptions.discard(subscription)
+                self._count -= 1
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def _deliver(self, user_ids, item):
+        with self._lock:
+            targets = [subscription for user_id in user_ids for subscription in self._subscriptions.get(user_id, ())]
+        for subscription in targets:
+            subscription.push(item)
+
+    def _deliver_all(self, item):
+        with self._lock:
+            targets = [subscription for subscriptions in self._subscriptions.values() for subscription in subscriptions]
+        for subscription in targets:
+            subscription.push(item)
+
+    def publish(self, events):
+        backend = self._redis()
+        if backend is None:
+            for user_ids, name, data in events:
+                self._deliver(user_ids, (name, data))
+            return
+        try:
+            pipe = backend._write_client.pipeline(transaction=False)
+            for user_ids, name, data in events:
+                pipe.publish(backend._get_prefix() + CHANNEL, json.dumps({"users": sorted(user_ids), "event": name, "data": data}))
+            pipe.execute()
+        except Exception:
+            # The change is committed either way; clients will pick it up on their next resync
+            app.logger.warning("Could not publish %d events", len(events), exc_info=True)
+
+    def _listen(self, backend):
+        channel = backend._get_prefix() + CHANNEL
+        delay = 0.5
+        reconnecting = False
+        while True:
+            pubsub = backend._read_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(channel)
+                if reconnecting:
+                    # Anything published while we were not subscribed is lost, so open streams resync
+                    self._deliver_all(RESYNC)
+                reconnecting = True
+                delay = 0.5
+                for message in pubsub.listen():
+                    if message["type"] == "message":
+                        payload = json.loads(message["data"])
+                        self._deliver(payload["users"], (payload["event"], payload["data"]))
+            except Exception:
+                app.logger.warning("Event listener disconnected, retrying in %.1fs", delay, exc_info=True)
+                time.sleep(delay)
+                delay = min(delay * 2, 30)
+            finally:
+                pubsub.close()
+
+
+event_broker = EventBroker()
+
+
+@event.listens_for(Session, "after_flush")
+def collect_events(session, flush_context):
+    events = session.info.setdefault("events", [])
+    for obj in session.new:
+        if type(obj) in EVENT_BUILDERS:
+            events.append(EVENT_BUILDERS[type(obj)](obj, "created"))
+    for obj in session.dirty:
+        if type(obj) in EVENT_BUILDERS and session.is_modified(obj):
+            events.append(EVENT_BUILDERS[type(obj)](obj, "updated"))
+    for obj in session.deleted:
+        if type(obj) in EVENT_BUILDERS:
+            events.append(EVENT_BUILDERS[type(obj)](obj, "deleted"))
+
+
+@event.listens_for(Session, "after_commit")
+def publish_events(session):
+    events = session.info.pop("events", None)
+    if events:
+        event_broker.publish(events)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_events(session):
+    session.info.pop("events", None)
@@ -0,0 +1,180 @@
+from functools import lru_cache
+import csv
+import math
+import os
+import re
+import unicodedata
+
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), "gazetteer.csv")
+
+# Other names people write for a country, beyond its code and the gazetteer's name
+COUNTRY_ALIASES = {
+    "GB": ["uk", "great britain", "britain"],
+    "US": ["usa", "united states of america", "america"],
+    "AE": ["uae"],
+}
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+# Stored precision, cells of about 5 x 5 m
+GEOHASH_PRECISION = 9
+# Sorts after every geohash character, so [prefix, prefix + "~") is all cells within prefix
+PREFIX_END = "~"
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+COORDINATES = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
+
+
+def normalize(text):
+    """Lowercase words of text with accents and punctuation dropped, "São Paulo" -> "sao paulo" """
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+@lru_cache(maxsize=1)
+def gazetteer():
+    """Map of normalized (place, [region], [country]) keys to (latitude, longitude), the most populous place winning.
+
+    Each place is one row; other names for it, such as "Bombay", are listed
+    in its aliases column separated by "|".
+    """
+    places = {}
+    with open(GAZETTEER_PATH, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            point = (float(row["latitude"]), float(row["longitude"]))
+            population = int(row["population"])
+            names = {normalize(name) for name in [row["name"], *row["aliases"].split("|")] if name}
+            regions = {normalize(row[field]) for field in ("admin_code", "admin_name")} - {""}
+            countries = {normalize(row["country_code"]), normalize(row["country_name"])}
+            countries.update(COUNTRY_ALIASES.get(row["country_code"], ()))
+            keys = [(name,) for name in names]
+            keys += [(name, qualifier) for name in names for qualifier in regions | countries]
+            keys += [(name, region, country) for name in names for region in regions for country in countries]
+            for key in keys:
+                if key not in places or places[key][1] < population:
+                    places[key] = (point, population)
+    return {key: point for key, (point, _) in places.items()}
+
+
+def geocode(text):
+    """(latitude, longitude) for a "City, Region, Country" location or a "lat, lon" pair, or None when unknown.
+
+    Leading parts that are not in the gazetteer, such as a neighbourhood,
+    are dropped one at a time until the rest is found.
+    """
+    if not text:
+        return None
+    match = COORDINATES.match(text)
+    if match:
+        latitude, longitude = float(match.group(1)), float(match.group(2))
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+            return latitude, longitude
+        return None
+    parts = [part for part in map(normalize, text.split(",")) if part]
+    places = gazetteer()
+    for start in range(len(parts)):
+        point = places.get(tuple(parts[start:]))
+        if point:
+            return point
+    return None
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    south, north, west, east = -90.0, 90.0, -180.0, 180.0
+    chars = []
+    bits = value = 0
+    even = True
+    while len(chars) < precision:
+        # Bits alternate between longitude and latitude, longitude first
+        if even:
+            middle = (west + east) / 2
+            if longitude >= middle:
+                value, west = value << 1 | 1, middle
+            else:
+                value, east = value << 1, middle
+        else:
+            middle = (south + north) / 2
+            if latitude >= middle:
+                value, south = value << 1 | 1, middle
+            else:
+                value, north = value << 1, middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = value = 0
+    return "".join(chars)
+
+
+def bounds(geohash):
+    """(south, north, west, east) of a geohash cell"""
+    south, north, west, east = -90.0, 90.0, -180.0, 180.0
+    even = True
+    for char in geohash:
+        value = GEOHASH_ALPHABET.index(char)
+        for shift in range(4, -1, -1):
+            bit = value >> shift & 1
+            if even:
+                middle = (west + east) / 2
+                west, east = (middle, east) if bit else (west, middle)
+            else:
+                middle = (south + north) / 2
+                south, north = (middle, north) if bit else (south, middle)
+            even = not even
+    return south, north, west, east
+
+
+def cell_size(precision):
+    """(height, width) in degrees of the cells at precision"""
+    latitude_bits = 5 * precision // 2
+    return 180 / 2 ** latitude_bits, 360 / 2 ** (5 * precision - latitude_bits)
+
+
+def locate(location):
+    """The latitude, longitude and geohash columns for a free-text location, all None when it cannot be placed"""
+    point = geocode(location)
+    if point is None:
+        return {"latitude": None, "longitude": None, "geohash": None}
+    return {"latitude": point[0], "longitude": point[1], "geohash": encode(*point)}
+
+
+def covering_prefixes(latitude, longitude, radius_km):
+    """Geohash prefixes whose cells together cover the circle, or None when it reaches a pole.
+
+    Picks the finest precision whose cells are at least radius_km across,
+    so the cell holding the centre and its eight neighbours contain the
+    whole circle.
+    """
+    farthest = abs(latitude) + radius_km / KM_PER_DEGREE
+    if farthest >= 90:
+        return None
+    # Cells narrow towards the poles, so size them for the circle's most poleward edge
+    shrink = math.cos(math.radians(farthest))
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        if height * KM_PER_DEGREE >= radius_km and width * KM_PER_DEGREE * shrink >= radius_km:
+            break
+    else:
+        return None
+
+    south, north, west, east = bounds(encode(latitude, longitude, precision))
+    middle_latitude, middle_longitude = (south + north) / 2, (west + east) / 2
+    prefixes = set()
+    for step_north in (-1, 0, 1):
+        cell_latitude = middle_latitude + step_north * height
+        if not -90 < cell_latitude < 90:
+            continue
+        for step_east in (-1, 0, 1):
+            cell_longitude = (middle_longitude + step_east * width + 180) % 360 - 180
+            prefixes.add(encode(cell_latitude, cell_longitude, precision))
+    return sorted(prefixes)
+
+
+def distance_km(latitude1, longitude1, latitude2, longitude2):
+    """Great-circle distance by the haversine formula"""
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    a = math.sin((phi2 - phi1) / 2) ** 2 \
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(longitude2 - longitude1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
@@ -0,0 +1,92 @@
+from app import app
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+from werkzeug.security import generate_password_hash, check_password_hash
+import threading
+
+
+class HashingPoolSaturated(Exception):
+    pass
+
+
+class PasswordHasher:
+    """Runs password hashing on a bounded process pool.
+
+    At most PASSWORD_HASH_WORKERS hashes run at once and at most
+    PASSWORD_HASH_QUEUE_DEPTH more wait for a worker; anything beyond that
+    is refused immediately with HashingPoolSaturated so request threads are
+    never tied up behind a login storm. Hashes that outlast
+    PASSWORD_HASH_TIMEOUT, or are lost with a crashed worker, are reported
+    the same way, and a broken pool is replaced for the next caller.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+
+    def _start(self):
+        with self._lock:
+            if self._slots is None:
+                workers = app.config["PASSWORD_HASH_WORKERS"]
+                if workers > 0:
+                    self._executor = ProcessPoolExecutor(max_workers=workers)
+                self._slots = threading.BoundedSemaphore(max(workers, 1) + app.config["PASSWORD_HASH_QUEUE_DEPTH"])
+
+    def _replace(self, broken):
+        with self._lock:
+            if self._executor is broken:
+                self._executor = ProcessPoolExecutor(max_workers=app.config["PASSWORD_HASH_WORKERS"])
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, func, *args):
+        if self._slots is None:
+            self._start()
+        if not self._slots.acquire(blocking=False):
+            raise HashingPoolSaturated()
+        if self._executor is None:
+            try:
+                return func(*args)
+            finally:
+                self._slots.release()
+        executor = self._executor
+        try:
+            future = executor.submit(func, *args)
+        except BrokenProcessPool:
+            self._slots.release()
+            self._replace(executor)
+            raise HashingPoolSaturated()
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=app.config["PASSWORD_HASH_TIMEOUT"])
+        except TimeoutError:
+            raise HashingPoolSaturated()
+        except BrokenProcessPool:
+            self._replace(executor)
+            raise HashingPoolSaturated()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, app.config["PASSWORD_HASH_METHOD"])
+
+    def hash_many(self, passwords):
+        """Hash a batch across every worker, for bulk imports; unlike hash() this waits instead of refusing"""
+        if self._slots is None:
+            self._start()
+        method = app.config["PASSWORD_HASH_METHOD"]
+        if self._executor is None:
+            return [generate_password_hash(password, method) for password in passwords]
+        chunksize = max(1, len(passwords) // (4 * app.config["PASSWORD_HASH_WORKERS"]))
+        return list(self._executor.map(generate_password_hash, passwords, repeat(method), chunksize=chunksize))
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        return pwhash.split("$", 1)[0] != app.config["PASSWORD_HASH_METHOD"]
+
+
+password_hasher = PasswordHasher()
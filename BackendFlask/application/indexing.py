@@ -0,0 +1,222 @@
+from abc import ABC, abstractmethod
+from app import app, db, cache
+from collections import namedtuple
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+from application.caching import increment
+from application.models import Skill, SkillWanted, SkillTerm
+from application.taxonomy import term_key
+import threading
+import time
+
+
+SkillEntry = namedtuple("SkillEntry", ["kind", "id", "user_id", "name", "description", "category", "term_id"])
+
+SKILL_MODELS = {Skill: "offered", SkillWanted: "wanted"}
+
+# Logged in place of a change set when an index must be rebuilt from the database
+REBUILD = "rebuild"
+
+_indexes = []
+
+
+def snapshot(skill):
+    """Copy the indexed columns of a Skill/SkillWanted into a plain tuple"""
+    return SkillEntry(
+        SKILL_MODELS[type(skill)],
+        skill.id,
+        int(skill.user_id),
+        skill.name,
+        skill.description,
+        skill.category,
+        skill.term_id
+    )
+
+
+class SkillIndex(ABC):
+    """In-process index over skills and skills_wanted.
+
+    Built lazily from the database and kept current from a change log in
+    the cache: every commit that writes skills bumps a shared version
+    counter and logs its changes under the new version, which each process
+    replays in order. A full rebuild happens only when the log cannot
+    bridge the gap, and is built off-lock while searches keep using the
+    current state.
+    """
+
+    version_key = None
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._rebuild_lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        self._missing = None
+        self._generation = 0
+
+    @abstractmethod
+    def clear(self):
+        """Reset to an empty index"""
+
+    @abstractmethod
+    def add(self, entry):
+        """Index a SkillEntry"""
+
+    @abstractmethod
+    def remove(self, kind, skill_id):
+        """Drop a skill from the index, if present"""
+
+    def _apply(self, added, removed):
+        for kind, skill_id in removed:
+            self.remove(kind, skill_id)
+        # Removing first makes replays idempotent, a rebuilt index may already hold the entry
+        for entry in added:
+            self.remove(entry.kind, entry.id)
+            self.add(entry)
+
+    def _remote_version(self):
+        return cache.get(self.version_key) or 0
+
+    def log_key(self, version):
+        return f"{self.version_key}:log:{version}"
+
+    def _catch_up(self):
+        """Replay logged changes up to the shared version; False when only a rebuild will do"""
+        remote = self._remote_version()
+        if remote == self._version:
+            return True
+        if remote < self._version or remote - self._version > app.config["SKILL_INDEX_MAX_REPLAY"]:
+            return False
+        versions = range(self._version + 1, remote + 1)
+        for version, change in zip(versions, cache.get_many(*[self.log_key(v) for v in versions])):
+            if change is None:
+                # Writers bump the version before logging their change, so give a missing one a sync interval to land
+                if self._missing != version:
+                    self._missing = version
+                    return True
+                return False
+            if change == REBUILD:
+                return False
+            self._apply(*change)
+            self._version = version
+        self._missing = None
+        return True
+
+    def rebuild(self):
+        version = self._remote_version()
+        fresh = type(self).__new__(type(self))
+        fresh.clear()
+        for model, kind in SKILL_MODELS.items():
+            rows = db.session.execute(
+                select(model.id, model.user_id, model.name, model.description, model.category, model.term_id)
+                .execution_options(yield_per=10000, index_rebuild=True, primary=True)
+            )
+            for row in rows:
+                fresh.add(SkillEntry(kind, *row))
+        with self._lock:
+            self.__dict__.update(vars(fresh))
+            self._generation += 1
+            self._version = version
+            self._missing = None
+            self._checked_at = time.monotonic()
+            # Changes committed while the rows were streamed are replayed on top
+            self._catch_up()
+
+    def ensure_current(self):
+        with self._lock:
+            built = self._version is not None
+            generation = self._generation
+            if built:
+                now = time.monotonic()
+                if now - self._checked_at < app.config["SKILL_INDEX_SYNC_INTERVAL"]:
+                    return
+                self._checked_at = now
+                if self._catch_up():
+                    return
+        # One thread rebuilds; the others keep searching the current state, or wait for the first build
+        if not self._rebuild_lock.acquire(blocking=not built):
+            return
+        try:
+            if self._generation == generation:
+                self.rebuild()
+        finally:
+            self._rebuild_lock.release()
+
+    def invalidate(self):
+        """Make every process, this one included, rebuild on its next use"""
+        cache.set(self.log_key(increment(self.version_key)), REBUILD, timeout=app.config["SKILL_INDEX_LOG_TIMEOUT"])
+        with self._lock:
+            self._checked_at = 0.0
+
+    def apply(self, added, removed):
+        version = increment(self.version_key)
+        cache.set(self.log_key(version), (added, removed), timeout=app.config["SKILL_INDEX_LOG_TIMEOUT"])
+        with self._lock:
+            if self._version is None:
+                return
+            if not self._catch_up() or self._version != version:
+                # Behind another process's change that has not been logged yet; retry on the next search
+                self._checked_at = 0.0
+
+
+def register_index(index):
+    _indexes.append(index)
+    return index
+
+
+def record_skill_changes(session, added=(), removed=()):
+    """Queue index updates for skills written with Core statements, applied on commit like flushed ones"""
+    session.info.setdefault("skills_added", []).extend(added)
+    session.info.setdefault("skills_removed", []).extend(removed)
+
+
+@event.listens_for(Session, "before_flush")
+def assign_skill_terms(session, flush_context, instances):
+    with session.no_autoflush:
+        pending = [
+            obj for obj in (*session.new, *session.dirty)
+            if type(obj) in SKILL_MODELS and (obj.term_id is None or inspect(obj).attrs.name.history.has_changes())
+        ]
+        if not pending:
+            return
+        ids = SkillTerm.intern((obj.name, obj.category) for obj in pending)
+    for obj in pending:
+        obj.term_id = ids.get(term_key(obj.name))
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def forget_created_terms(session):
+    session.info.pop("skill_terms_created", None)
+
+
+@event.listens_for(Session, "after_flush")
+def collect_skill_changes(session, flush_context):
+    added = session.info.setdefault("skills_added", [])
+    removed = session.info.setdefault("skills_removed", [])
+    for obj in session.deleted:
+        if type(obj) in SKILL_MODELS:
+            removed.append((SKILL_MODELS[type(obj)], obj.id))
+    for obj in session.dirty:
+        if type(obj) in SKILL_MODELS and session.is_modified(obj):
+            removed.append((SKILL_MODELS[type(obj)], obj.id))
+            added.append(snapshot(obj))
+    for obj in session.new:
+        if type(obj) in SKILL_MODELS:
+            added.append(snapshot(obj))
+
+
+@event.listens_for(Session, "after_commit")
+def apply_skill_changes(session):
+    added = session.info.pop("skills_added", [])
+    removed = session.info.pop("skills_removed", [])
+    if not added and not removed:
+        return
+    for index in _indexes:
+        index.apply(added, removed)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_skill_changes(session):
+    session.info.pop("skills_added", None)
+    session.info.pop("skills_removed", None)
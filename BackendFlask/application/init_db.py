@@ -1,161 +1,203 @@
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
 from app import app, db
-from application.models import User, Skill, SkillWanted
+from application.models import User, Skill, SkillWanted, SkillTerm, Feedback, UserRating
+from sqlalchemy import inspect, select
 from werkzeug.security import generate_password_hash
+import os
 
-with app.app_context():
-    db.create_all()
 
-    if not User.query.filter_by(email="admin@email.com").first():
-        pwhashed = generate_password_hash("Sankalp")
-        admin = User(
-            name="Administrator",
-            email="admin@email.com",
-            password_hashed=pwhashed,
-            role="admin",
-            status="verified",
-            location="Admin Office",
-            is_public=False,
-            availability=[]
-        )
-        db.session.add(admin)
-        db.session.commit()
-        print("Admin user created successfully")
+def schema_revision():
+    """"new" for an empty database, "current" at the latest migration, else "behind" """
+    migrations = ScriptDirectory(os.path.join(app.root_path, "migrations"))
+    with db.engine.begin() as connection:
+        context = MigrationContext.configure(connection)
+        if not inspect(connection).has_table(User.__tablename__):
+            return "new"
+        if set(context.get_current_heads()) == set(migrations.get_heads()):
+            return "current"
+        return "behind"
+
+
+def stamp_latest():
+    """Record a database create_all() just built as being at the latest migration"""
+    migrations = ScriptDirectory(os.path.join(app.root_path, "migrations"))
+    with db.engine.begin() as connection:
+        MigrationContext.configure(connection).stamp(migrations, "heads")
+
 
-    sample_users = [
-        {
-            "name": "John Developer",
-            "email": "john@example.com",
-            "password": "password123",
-            "location": "New York, NY",
-            "skills_offered": [
-                {"name": "React Development", "description": "Frontend web development with React",
-                    "category": "Technology", "level": "advanced"},
-                {"name": "Node.js", "description": "Backend development with Node.js",
-                    "category": "Technology", "level": "intermediate"}
-            ],
-            "skills_wanted": [
-                {"name": "UI/UX Design", "description": "User interface and experience design",
-                    "category": "Design", "level_needed": "intermediate"},
-                {"name": "Python", "description": "Python programming language",
-                    "category": "Technology", "level_needed": "beginner"}
-            ]
-        },
-        {
-            "name": "Sarah Designer",
-            "email": "sarah@example.com",
-            "password": "password123",
-            "location": "Los Angeles, CA",
-            "skills_offered": [
-                {"name": "UI/UX Design", "description": "User interface and experience design",
-                    "category": "Design", "level": "expert"},
-                {"name": "Adobe Photoshop", "description": "Photo editing and graphic design",
-                    "category": "Design", "level": "advanced"}
-            ],
-            "skills_wanted": [
-                {"name": "React Development", "description": "Frontend web development with React",
-                    "category": "Technology", "level_needed": "intermediate"},
-                {"name": "Digital Marketing", "description": "Online marketing strategies",
-                    "category": "Marketing", "level_needed": "beginner"}
-            ]
-        },
-        {
-            "name": "Mike Writer",
-            "email": "mike@example.com",
-            "password": "password123",
-            "location": "Chicago, IL",
-            "skills_offered": [
-                {"name": "Content Writing", "description": "Blog posts and articles",
-                    "category": "Writing", "level": "expert"},
-                {"name": "Copywriting", "description": "Marketing and sales copy",
-                    "category": "Writing", "level": "advanced"}
-            ],
-            "skills_wanted": [
-                {"name": "SEO", "description": "Search engine optimization",
-                    "category": "Marketing", "level_needed": "intermediate"},
-                {"name": "Social Media Marketing", "description": "Social media strategy and management",
-                    "category": "Marketing", "level_needed": "beginner"}
-            ]
-        },
-        {
-            "name": "Emma Data Scientist",
-            "email": "emma@example.com",
-            "password": "password123",
-            "location": "San Francisco, CA",
-            "skills_offered": [
-                {"name": "Python", "description": "Python programming for data science",
-                    "category": "Technology", "level": "expert"},
-                {"name": "Machine Learning", "description": "ML model development and deployment",
-                    "category": "Technology", "level": "advanced"}
-            ],
-            "skills_wanted": [
-                {"name": "Data Visualization", "description": "Creating charts and dashboards",
-                    "category": "Technology", "level_needed": "intermediate"},
-                {"name": "Statistics", "description": "Statistical analysis and interpretation",
-                    "category": "Mathematics", "level_needed": "advanced"}
-            ]
-        },
-        {
-            "name": "Alex Marketing Pro",
-            "email": "alex@example.com",
-            "password": "password123",
-            "location": "Austin, TX",
-            "skills_offered": [
-                {"name": "Digital Marketing", "description": "Online marketing strategies and campaigns",
-                    "category": "Marketing", "level": "expert"},
-                {"name": "SEO", "description": "Search engine optimization techniques",
-                    "category": "Marketing", "level": "advanced"},
-                {"name": "Social Media Marketing", "description": "Social media strategy and management",
-                    "category": "Marketing", "level": "advanced"}
-            ],
-            "skills_wanted": [
-                {"name": "Content Writing", "description": "Blog posts and marketing copy",
-                    "category": "Writing", "level_needed": "intermediate"},
-                {"name": "Graphic Design", "description": "Visual design for marketing materials",
-                    "category": "Design", "level_needed": "beginner"}
-            ]
-        }
-    ]
+with app.app_context():
+    revision = schema_revision()
+    # Older databases are left alone, so `flask db upgrade` can import the app to migrate them
+    if revision == "behind":
+        app.logger.warning("Database schema is behind the migrations; run `flask db upgrade`")
+    else:
+        db.create_all()
+        if revision == "new":
+            stamp_latest()
+
+        # Backfill rating summaries for feedback recorded before user_ratings existed
+        if db.session.scalar(select(Feedback.id).limit(1)) and not db.session.scalar(select(UserRating.user_id).limit(1)):
+            UserRating.rebuild_all()
+            db.session.commit()
 
-    for user_data in sample_users:
-        if not User.query.filter_by(email=user_data["email"]).first():
-            pwhashed = generate_password_hash(user_data["password"])
-            user = User(
-                name=user_data["name"],
-                email=user_data["email"],
+        if not User.query.filter_by(email="admin@email.com").first():
+            pwhashed = generate_password_hash("Sankalp")
+            admin = User(
+                name="Administrator",
+                email="admin@email.com",
                 password_hashed=pwhashed,
-                role="user",
+                role="admin",
                 status="verified",
-                location=user_data["location"],
-                is_public=True,
-                availability=[
-                    {"day": "Monday", "startTime": "09:00", "endTime": "17:00"},
-                    {"day": "Tuesday", "startTime": "09:00", "endTime": "17:00"},
-                    {"day": "Wednesday", "startTime": "09:00", "endTime": "17:00"},
-                    {"day": "Thursday", "startTime": "09:00", "endTime": "17:00"},
-                    {"day": "Friday", "startTime": "09:00", "endTime": "17:00"}
-                ]
+                location="Admin Office",
+                is_public=False,
+                availability=[]
             )
-            db.session.add(user)
-            db.session.flush()  # Flush to get the user ID
+            db.session.add(admin)
+            db.session.commit()
+            print("Admin user created successfully")
 
-            for skill_data in user_data["skills_offered"]:
-                skill = Skill(
-                    user_id=user.id,
-                    name=skill_data["name"],
-                    description=skill_data["description"],
-                    category=skill_data["category"],
-                    level=skill_data["level"]
-                )
-                db.session.add(skill)
+        sample_users = [
+            {
+                "name": "John Developer",
+                "email": "john@example.com",
+                "password": "password123",
+                "location": "New York, NY",
+                "skills_offered": [
+                    {"name": "React Development", "description": "Frontend web development with React",
+                        "category": "Technology", "level": "advanced"},
+                    {"name": "Node.js", "description": "Backend development with Node.js",
+                        "category": "Technology", "level": "intermediate"}
+                ],
+                "skills_wanted": [
+                    {"name": "UI/UX Design", "description": "User interface and experience design",
+                        "category": "Design", "level_needed": "intermediate"},
+                    {"name": "Python", "description": "Python programming language",
+                        "category": "Technology", "level_needed": "beginner"}
+                ]
+            },
+            {
+                "name": "Sarah Designer",
+                "email": "sarah@example.com",
+                "password": "password123",
+                "location": "Los Angeles, CA",
+                "skills_offered": [
+                    {"name": "UI/UX Design", "description": "User interface and experience design",
+                        "category": "Design", "level": "expert"},
+                    {"name": "Adobe Photoshop", "description": "Photo editing and graphic design",
+                        "category": "Design", "level": "advanced"}
+                ],
+                "skills_wanted": [
+                    {"name": "React Development", "description": "Frontend web development with React",
+                        "category": "Technology", "level_needed": "intermediate"},
+                    {"name": "Digital Marketing", "description": "Online marketing strategies",
+                        "category": "Marketing", "level_needed": "beginner"}
+                ]
+            },
+            {
+                "name": "Mike Writer",
+                "email": "mike@example.com",
+                "password": "password123",
+                "location": "Chicago, IL",
+                "skills_offered": [
+                    {"name": "Content Writing", "description": "Blog posts and articles",
+                        "category": "Writing", "level": "expert"},
+                    {"name": "Copywriting", "description": "Marketing and sales copy",
+                        "category": "Writing", "level": "advanced"}
+                ],
+                "skills_wanted": [
+                    {"name": "SEO", "description": "Search engine optimization",
+                        "category": "Marketing", "level_needed": "intermediate"},
+                    {"name": "Social Media Marketing", "description": "Social media strategy and management",
+                        "category": "Marketing", "level_needed": "beginner"}
+                ]
+            },
+            {
+                "name": "Emma Data Scientist",
+                "email": "emma@example.com",
+                "password": "password123",
+                "location": "San Francisco, CA",
+                "skills_offered": [
+                    {"name": "Python", "description": "Python programming for data science",
+                        "category": "Technology", "level": "expert"},
+                    {"name": "Machine Learning", "description": "ML model development and deployment",
+                        "category": "Technology", "level": "advanced"}
+                ],
+                "skills_wanted": [
+                    {"name": "Data Visualization", "description": "Creating charts and dashboards",
+                        "category": "Technology", "level_needed": "intermediate"},
+                    {"name": "Statistics", "description": "Statistical analysis and interpretation",
+                        "category": "Mathematics", "level_needed": "advanced"}
+                ]
+            },
+            {
+                "name": "Alex Marketing Pro",
+                "email": "alex@example.com",
+                "password": "password123",
+                "location": "Austin, TX",
+                "skills_offered": [
+                    {"name": "Digital Marketing", "description": "Online marketing strategies and campaigns",
+                        "category": "Marketing", "level": "expert"},
+                    {"name": "SEO", "description": "Search engine optimization techniques",
+                        "category": "Marketing", "level": "advanced"},
+                    {"name": "Social Media Marketing", "description": "Social media strategy and management",
+                        "category": "Marketing", "level": "advanced"}
+                ],
+                "skills_wanted": [
+                    {"name": "Content Writing", "description": "Blog posts and marketing copy",
+                        "category": "Writing", "level_needed": "intermediate"},
+                    {"name": "Graphic Design", "description": "Visual design for marketing materials",
+                        "category": "Design", "level_needed": "beginner"}
+                ]
+            }
+        ]
 
-            for skill_data in user_data["skills_wanted"]:
-                skill_wanted = SkillWanted(
-                    user_id=user.id,
-                    name=skill_data["name"],
-                    description=skill_data["description"],
-                    category=skill_data["category"],
-                    level_needed=skill_data["level_needed"]
+        for user_data in sample_users:
+            if not User.query.filter_by(email=user_data["email"]).first():
+                pwhashed = generate_password_hash(user_data["password"])
+                user = User(
+                    name=user_data["name"],
+                    email=user_data["email"],
+                    password_hashed=pwhashed,
+                    role="user",
+                    status="verified",
+                    location=user_data["location"],
+                    is_public=True,
+                    availability=[
+                        {"day": "Monday", "startTime": "09:00", "endTime": "17:00"},
+                        {"day": "Tuesday", "startTime": "09:00", "endTime": "17:00"},
+                        {"day": "Wednesday", "startTime": "09:00", "endTime": "17:00"},
+                        {"day": "Thursday", "startTime": "09:00", "endTime": "17:00"},
+                        {"day": "Friday", "startTime": "09:00", "endTime": "17:00"}
+                    ]
                 )
-                db.session.add(skill_wanted)
+                db.session.add(user)
+                db.session.flush()  # Flush to get the user ID
+
+                for skill_data in user_data["skills_offered"]:
+                    skill = Skill(
+                        user_id=user.id,
+                        name=skill_data["name"],
+                        description=skill_data["description"],
+                        category=skill_data["category"],
+                        level=skill_data["level"]
+                    )
+                    db.session.add(skill)
 
-    db.session.commit()
+                for skill_data in user_data["skills_wanted"]:
+                    skill_wanted = SkillWanted(
+                        user_id=user.id,
+                        name=skill_data["name"],
+                        description=skill_data["description"],
+                        category=skill_data["category"],
+                        level_needed=skill_data["level_needed"]
+                    )
+                    db.session.add(skill_wanted)
+
+        db.session.commit()
+
+        # Canonical skill terms, then terms for skills saved without one, the samples above included
+        SkillTerm.seed()
+        if any(db.session.scalar(select(model.id).filter(model.term_id.is_(None)).limit(1)) for model in (Skill, SkillWanted)):
+            SkillTerm.backfill()
+        db.session.commit()
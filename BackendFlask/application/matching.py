@@ -0,0 +1,79 @@
+from application.indexing import SkillIndex, register_index
+from collections import Counter, defaultdict
+from itertools import chain
+import heapq
+
+
+class SkillMatchIndex(SkillIndex):
+    """Bipartite index from skill terms to the users offering and wanting them.
+
+    A reciprocal match for a user is someone who offers a skill the user
+    wants and wants a skill the user offers; both sides are read straight
+    from the index instead of joining skills against skills_wanted.
+    """
+
+    version_key = "skill_match_index:version"
+
+    def clear(self):
+        self.entries = {}
+        self.labels = {}
+        self.users = {"offered": defaultdict(Counter), "wanted": defaultdict(Counter)}
+        self.terms = {"offered": defaultdict(Counter), "wanted": defaultdict(Counter)}
+
+    def add(self, entry):
+        # Skills share a term when their names are aliases of one canonical skill, "ReactJS" and "React Development"
+        term = entry.term_id
+        if term is None:
+            return
+        self.entries[(entry.kind, entry.id)] = (entry.user_id, term)
+        self.labels.setdefault(term, entry.name)
+        self.users[entry.kind][term][entry.user_id] += 1
+        self.terms[entry.kind][entry.user_id][term] += 1
+
+    def remove(self, kind, skill_id):
+        entry = self.entries.pop((kind, skill_id), None)
+        if entry is None:
+            return
+        user_id, term = entry
+        for mapping, outer, inner in ((self.users[kind], term, user_id), (self.terms[kind], user_id, term)):
+            counts = mapping[outer]
+            counts[inner] -= 1
+            if counts[inner] <= 0:
+                del counts[inner]
+            if not counts:
+                del mapping[outer]
+
+    def matches(self, user_id, limit):
+        """Return up to limit (other_user_id, they_offer, they_want) tuples, best first"""
+        self.ensure_current()
+        with self._lock:
+            wanted = self.terms["wanted"].get(user_id, {}).keys()
+            offered = self.terms["offered"].get(user_id, {}).keys()
+            # Count, per other user, the terms they offer that we want and the
+            # terms they want that we offer; Counter tallies the postings in C,
+            # and only the top limit candidates get their term sets built
+            they_offer = Counter(chain.from_iterable(self.users["offered"].get(term, {}).keys() for term in wanted))
+            they_want = Counter(chain.from_iterable(self.users["wanted"].get(term, {}).keys() for term in offered))
+            candidates = they_offer.keys() & they_want.keys()
+            candidates.discard(user_id)
+
+            ranked = heapq.nsmallest(
+                limit,
+                candidates,
+                key=lambda other: (
+                    -they_offer[other] * they_want[other],
+                    -(they_offer[other] + they_want[other]),
+                    other
+                )
+            )
+            return [
+                (
+                    other,
+                    sorted(self.labels[term] for term in wanted & self.terms["offered"][other].keys()),
+                    sorted(self.labels[term] for term in offered & self.terms["wanted"][other].keys())
+                )
+                for other in ranked
+            ]
+
+
+skill_matches = register_index(SkillMatchIndex())
@@ -0,0 +1,152 @@
+from app import app
+from concurrent.futures import ThreadPoolExecutor
+from flask import abort, make_response, send_from_directory
+from werkzeug.security import safe_join
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+CHUNK_SIZE = 64 * 1024
+
+CONTENT_ADDRESSED = re.compile(r"[0-9a-f]{64}(_[a-z]+)?")
+
+SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpg"),
+]
+
+_thumbnailer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnailer")
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class UnsupportedImage(Exception):
+    pass
+
+
+def sniff_image_type(header):
+    """Image extension from the file's magic bytes, ignoring the client-supplied name"""
+    for signature, extension in SIGNATURES:
+        if header.startswith(signature):
+            return extension
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def variant_filename(filename, variant):
+    stem, extension = filename.rsplit(".", 1)
+    return f"{stem}_{variant}.{extension}"
+
+
+def photo_variant(filename, variant):
+    """Name of a resized variant of filename if it has been generated, else filename itself"""
+    candidate = variant_filename(filename, variant)
+    if os.path.exists(os.path.join(app.config["PROFILE_PHOTO_FOLDER"], candidate)):
+        return candidate
+    return filename
+
+
+def store_profile_photo(stream):
+    """Stream an upload to disk under the SHA-256 of its contents.
+
+    Returns (filename, created); created is False when an identical photo
+    was already stored and the upload was deduplicated against it.
+    """
+    folder = app.config["PROFILE_PHOTO_FOLDER"]
+    max_size = app.config["PROFILE_PHOTO_MAX_SIZE"]
+    os.makedirs(folder, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    extension = None
+    fd, temp_path = tempfile.mkstemp(dir=folder, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as temp:
+            while chunk := stream.read(CHUNK_SIZE):
+                if extension is None:
+                    extension = sniff_image_type(chunk)
+                    if extension is None:
+                        raise UnsupportedImage()
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge()
+                digest.update(chunk)
+                temp.write(chunk)
+        if extension is None:
+            raise UnsupportedImage()
+
+        filename = f"{digest.hexdigest()}.{extension}"
+        path = os.path.join(folder, filename)
+        if os.path.exists(path):
+            os.remove(temp_path)
+            return filename, False
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    _thumbnailer.submit(make_thumbnail, path, app.config["PROFILE_PHOTO_THUMBNAIL_SIZE"])
+    return filename, True
+
+
+def make_thumbnail(path, size):
+    if Image is None:
+        return
+    target = variant_filename(path, "thumb")
+    if os.path.exists(target):
+        return
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    try:
+        with Image.open(path) as image, os.fdopen(fd, "wb") as temp:
+            image_format = image.format
+            image.thumbnail((size, size))
+            image.save(temp, format=image_format)
+        os.replace(temp_path, target)
+    except Exception:
+        app.logger.exception("Failed to generate thumbnail for %s", path)
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def send_profile_photo(filename):
+    """Serve a stored photo with long-lived caching, conditional and range request support.
+
+    Stored names never change content (content hashes, or UUIDs for older
+    uploads), so responses are cacheable forever. With
+    MEDIA_X_ACCEL_REDIRECT_PREFIX set the body is handed off to nginx, and
+    with USE_X_SENDFILE to the front server's sendfile.
+    """
+    folder = os.path.abspath(app.config["PROFILE_PHOTO_FOLDER"])
+    max_age = app.config["MEDIA_CACHE_MAX_AGE"]
+    stem = filename.rsplit(".", 1)[0]
+    etag = stem if CONTENT_ADDRESSED.fullmatch(stem) else True
+
+    prefix = app.config["MEDIA_X_ACCEL_REDIRECT_PREFIX"]
+    if prefix:
+        path = safe_join(folder, filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        response = make_response("")
+        response.headers["X-Accel-Redirect"] = f"{prefix.rstrip('/')}/{filename}"
+        response.headers["Content-Type"] = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        if etag is not True:
+            response.set_etag(etag)
+    else:
+        response = send_from_directory(folder, filename, conditional=True, etag=etag, max_age=max_age)
+
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    response.cache_control.immutable = True
+    return response
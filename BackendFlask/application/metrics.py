@@ -0,0 +1,168 @@
+from app import app, api
+from flask import g, has_request_context, request
+from flask_restful.representations.json import output_json
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from collections import defaultdict
+import bisect
+import threading
+import time
+
+
+# Latency buckets in seconds, shared by every histogram
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_metrics = []
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names, values, extra=()):
+    pairs = [f'{name}="{escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic per-label-set counter, rendered in the Prometheus text format"""
+
+    kind = "counter"
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] += amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{format_labels(self.labels, labels)} {value:g}"
+
+
+class Histogram(Counter):
+    """Cumulative bucket histogram with _bucket, _sum and _count series"""
+
+    kind = "histogram"
+
+    def __init__(self, name, description, labels=(), buckets=BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = buckets
+        self._values = {}
+
+    def observe(self, labels, value):
+        with self._lock:
+            counts, total = self._values.get(labels, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[labels] = (counts, total + value)
+
+    def samples(self):
+        with self._lock:
+            values = {labels: (list(counts), total) for labels, (counts, total) in self._values.items()}
+        for labels, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                yield f"{self.name}_bucket{format_labels(self.labels, labels, [('le', le)])} {cumulative}"
+            yield f"{self.name}_sum{format_labels(self.labels, labels)} {total:g}"
+            yield f"{self.name}_count{format_labels(self.labels, labels)} {cumulative}"
+
+
+def render():
+    """All metrics of this process in the Prometheus text exposition format"""
+    lines = []
+    for metric in _metrics:
+        lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+request_duration = Histogram(
+    "skillxchange_http_request_duration_seconds", "Time spent handling a request", ("endpoint", "method")
+)
+requests_total = Counter(
+    "skillxchange_http_requests_total", "Requests handled, by response status", ("endpoint", "method", "status")
+)
+db_queries = Counter("skillxchange_db_queries_total", "SQL statements executed while handling requests", ("endpoint",))
+db_seconds = Counter("skillxchange_db_query_seconds_total", "Time spent in SQL while handling requests", ("endpoint",))
+slow_queries = Counter("skillxchange_db_slow_queries_total", "SQL statements over SLOW_QUERY_THRESHOLD_MS", ("endpoint",))
+cache_requests = Counter("skillxchange_cache_requests_total", "View and profile cache lookups", ("cache", "result"))
+
+
+def current_endpoint():
+    return (request.endpoint or "unmatched") if has_request_context() else None
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def record_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    endpoint = current_endpoint()
+    if endpoint is not None:
+        g.db_queries = g.get("db_queries", 0) + 1
+        g.db_time = g.get("db_time", 0.0) + elapsed
+
+    threshold = app.config["SLOW_QUERY_THRESHOLD_MS"]
+    if threshold > 0 and elapsed * 1000 >= threshold:
+        if endpoint is not None:
+            slow_queries.inc((endpoint,))
+        # Parameters are left out on purpose, they can carry personal data
+        app.logger.warning("Slow query (%.1f ms) in %s: %s", elapsed * 1000, endpoint or "-", " ".join(statement.split()))
+
+
+@event.listens_for(Engine, "handle_error")
+def drop_query_timer(context):
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+@api.representation("application/json")
+def timed_output_json(data, code, headers=None):
+    started = time.perf_counter()
+    response = output_json(data, code, headers)
+    if has_request_context():
+        g.serialize_time = g.get("serialize_time", 0.0) + time.perf_counter() - started
+    return response
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    started = g.pop("request_started", None)
+    if started is None:
+        return response
+    total = time.perf_counter() - started
+    endpoint = current_endpoint()
+    queries, db_time, serialize_time = g.get("db_queries", 0), g.get("db_time", 0.0), g.get("serialize_time", 0.0)
+
+    request_duration.observe((endpoint, request.method), total)
+    requests_total.inc((endpoint, request.method, str(response.status_code)))
+    if queries:
+        db_queries.inc((endpoint,), queries)
+        db_seconds.inc((endpoint,), db_time)
+
+    response.headers.add(
+        "Server-Timing",
+        f'db;dur={db_time * 1000:.2f};desc="{queries} queries", '
+        f"serialize;dur={serialize_time * 1000:.2f}, total;dur={total * 1000:.2f}"
+    )
+    return response
@@ -1,11 +1,45 @@
 from app import db
+from application import availability as week
+from application import geo
+from application import media
+from application import taxonomy
 from datetime import datetime, timezone, timedelta
-from sqlalchemy import Text, JSON
+from sqlalchemy import Text, JSON, bindparam, case, delete, func, insert, select, update
+from sqlalchemy.orm import validates
 import uuid
 
 
+def now_ist():
+    return datetime.now(timezone(timedelta(hours=5, minutes=30)))
+
+
+def upsert(model, conflict, update=None):
+    """INSERT into model that skips rows colliding on the unique conflict columns.
+
+    With update, colliding rows get update's (column name, expression)
+    pairs instead; MySQL applies them in order against updated values.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        stmt = dialect_insert(model)
+        return stmt.on_duplicate_key_update(update) if update else stmt.prefix_with("IGNORE")
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    stmt = dialect_insert(model)
+    if update:
+        return stmt.on_conflict_do_update(index_elements=conflict, set_=dict(update))
+    return stmt.on_conflict_do_nothing(index_elements=conflict)
+
+
 class User(db.Model):
     __tablename__ = "users"
+    __table_args__ = (
+        db.Index("ix_users_is_public_id", "is_public", "id"),
+        db.Index("ix_users_is_public_geohash", "is_public", "geohash"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     uuid = db.Column(db.String(36), unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
@@ -14,10 +48,16 @@ class User(db.Model):
     email = db.Column(db.String(120), nullable=False, unique=True)
     password_hashed = db.Column(db.String(256), nullable=False)
     location = db.Column(db.String(200), nullable=True)
+    # location placed with the offline gazetteer, kept in step by geocode_location
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    geohash = db.Column(db.String(geo.GEOHASH_PRECISION), nullable=True)
     profile_photo = db.Column(db.String(255), nullable=True, default='default_avatar.png')
 
     is_public = db.Column(db.Boolean, default=True, nullable=False)
     availability = db.Column(JSON, nullable=True)
+    # availability compiled to one bit per 15-minute slot of the week, kept in step by compile_availability
+    availability_mask = db.Column(db.LargeBinary(week.MASK_BYTES), nullable=True)
 
     role = db.Column(db.Enum("admin", "user"), nullable=True)
     status = db.Column(db.Enum("pending", "verified", "blocked"), nullable=True, default="verified")
@@ -30,37 +70,153 @@ class User(db.Model):
     received_requests = db.relationship('SwapRequest', foreign_keys='SwapRequest.receiver_id', back_populates='receiver')
     given_feedbacks = db.relationship('Feedback', foreign_keys='Feedback.from_user_id', back_populates='from_user')
     received_feedbacks = db.relationship('Feedback', foreign_keys='Feedback.to_user_id', back_populates='to_user')
+    rating_summary = db.relationship('UserRating', back_populates='user', uselist=False, cascade='all, delete-orphan')
+
+    @validates("availability")
+    def compile_availability(self, key, value):
+        self.availability_mask = week.to_bytes(week.week_mask(value or []))
+        return value
+
+    @validates("location")
+    def geocode_location(self, key, value):
+        for column, placed in geo.locate(value).items():
+            setattr(self, column, placed)
+        return value
 
-    def get_profile_photo_url(self):
-        """Helper method to get the full URL for the profile photo"""
+    def get_profile_photo_url(self, variant=None):
+        """Helper method to get the full URL for the profile photo, or for a resized variant of it"""
         if self.profile_photo:
-            return f"/static/uploads/profile_photos/{self.profile_photo}"
+            filename = media.photo_variant(self.profile_photo, variant) if variant else self.profile_photo
+            return f"/static/uploads/profile_photos/{filename}"
         return "/static/images/default_avatar.png"
 
-    def to_dict(self):
+    def to_dict(self, photo_variant=None):
         """Convert user to dictionary for API responses"""
         return {
             'id': self.uuid,
             'name': self.name,
             'email': self.email,
             'location': self.location,
-            'profilePhoto': self.get_profile_photo_url(),
+            'profilePhoto': self.get_profile_photo_url(photo_variant),
             'isPublic': self.is_public,
             'availability': self.availability or [],
             'skillsOffered': [skill.to_dict() for skill in self.skills_offered],
             'skillsWanted': [skill.to_dict() for skill in self.skills_wanted],
+            'rating': UserRating.summarize(self.rating_summary),
             'createdAt': self.created_at.isoformat() if self.created_at else None
         }
 
 
+# Terms whose ids each process keeps in memory
+TERM_CACHE_SIZE = 100000
+
+
+class SkillTerm(db.Model):
+    """Canonical skill that every Skill and SkillWanted whose name normalizes to its key points at"""
+    __tablename__ = "skill_terms"
+
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(100), unique=True, nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    category = db.Column(db.String(50), nullable=True)
+
+    # Ids of committed terms by key; terms are never renamed or removed, so entries never go stale
+    _ids = {}
+
+    @classmethod
+    def intern(cls, skills):
+        """Map the term key of each (name, category) pair to its term id, creating terms for new keys"""
+        first_seen = {}
+        for name, category in skills:
+            key = taxonomy.term_key(name)
+            if key:
+                first_seen.setdefault(key, (name, category))
+        ids = {key: cls._ids[key] for key in first_seen if key in cls._ids}
+        missing = [key for key in first_seen if key not in ids]
+        if missing:
+            found = dict(db.session.execute(
+                select(cls.key, cls.id).filter(cls.key.in_(missing)).execution_options(primary=True)
+            ).all())
+            ids.update(found)
+            # Terms this transaction created may still be rolled back, so only others' are cached
+            created = db.session.info.setdefault("skill_terms_created", set())
+            if len(cls._ids) < TERM_CACHE_SIZE:
+                cls._ids.update((key, term_id) for key, term_id in found.items() if key not in created)
+            missing = [key for key in missing if key not in found]
+        if missing:
+            # Keys another writer creates in the meantime are skipped rather than failing the insert
+            db.session.execute(upsert(cls, ["key"]), [
+                {
+                    "key": key,
+                    "name": taxonomy.term_name(key, first_seen[key][0]),
+                    "category": first_seen[key][1] or None
+                }
+                for key in missing
+            ])
+            ids.update(db.session.execute(
+                select(cls.key, cls.id).filter(cls.key.in_(missing)).execution_options(primary=True)
+            ).all())
+            created.update(missing)
+        return ids
+
+    @classmethod
+    def assign(cls, rows):
+        """Set term_id on skill row dicts bound for a Core insert"""
+        ids = cls.intern((row["name"], row.get("category")) for row in rows)
+        for row in rows:
+            row["term_id"] = ids.get(taxonomy.term_key(row["name"]))
+        return rows
+
+    @classmethod
+    def seed(cls):
+        """Insert the terms shipped in skill_terms.csv that are not there yet, in the caller's transaction"""
+        existing = set(db.session.scalars(select(cls.key).filter(cls.key.in_([key for key, _, _ in taxonomy.seeds()]))))
+        rows = [
+            {"key": key, "name": name, "category": category}
+            for key, name, category in taxonomy.seeds() if key not in existing
+        ]
+        if rows:
+            db.session.execute(insert(cls), rows)
+
+    @classmethod
+    def backfill(cls, batch_size=5000):
+        """Point skills saved without a term at theirs, batch by batch in the caller's transaction"""
+        for model in (Skill, SkillWanted):
+            table = model.__table__
+            last = ""
+            while True:
+                # Walk names in order, names without any words never get a term and would otherwise come back
+                names = db.session.scalars(
+                    select(model.name).filter(model.term_id.is_(None), model.name > last)
+                    .distinct().order_by(model.name).limit(batch_size)
+                ).all()
+                if not names:
+                    break
+                last = names[-1]
+                ids = cls.intern((name, None) for name in names)
+                assigned = [
+                    {"skill_name": name, "term": ids[taxonomy.term_key(name)]}
+                    for name in names if taxonomy.term_key(name)
+                ]
+                if assigned:
+                    db.session.execute(
+                        update(table)
+                        .where(table.c.name == bindparam("skill_name"), table.c.term_id.is_(None))
+                        .values(term_id=bindparam("term")),
+                        assigned
+                    )
+
+
 class Skill(db.Model):
     __tablename__ = "skills"
 
     id = db.Column(db.Integer, primary_key=True)
     uuid = db.Column(db.String(36), unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
 
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, index=True)
+    # Set from name when the row is flushed, see application.indexing.assign_skill_terms
+    term_id = db.Column(db.Integer, db.ForeignKey('skill_terms.id'), nullable=True, index=True)
     description = db.Column(Text, nullable=True)
     category = db.Column(db.String(50), nullable=True)
     level = db.Column(db.Enum("beginner", "intermediate", "advanced", "expert"), nullable=True)
@@ -84,9 +240,11 @@ class SkillWanted(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     uuid = db.Column(db.String(36), unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
 
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, index=True)
+    # Set from name when the row is flushed, see application.indexing.assign_skill_terms
+    term_id = db.Column(db.Integer, db.ForeignKey('skill_terms.id'), nullable=True, index=True)
     description = db.Column(Text, nullable=True)
     category = db.Column(db.String(50), nullable=True)
     level_needed = db.Column(db.Enum("beginner", "intermediate", "advanced", "expert"), nullable=True)
@@ -107,6 +265,12 @@ class SkillWanted(db.Model):
 
 class SwapRequest(db.Model):
     __tablename__ = "swap_requests"
+    __table_args__ = (
+        db.Index("ix_swap_requests_sender_updated", "sender_id", "updated_at"),
+        db.Index("ix_swap_requests_receiver_updated", "receiver_id", "updated_at"),
+        db.Index("ix_swap_requests_sender_created", "sender_id", "created_at"),
+        db.Index("ix_swap_requests_receiver_created", "receiver_id", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     uuid = db.Column(db.String(36), unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
@@ -117,15 +281,15 @@ class SwapRequest(db.Model):
     skill_offered = db.Column(JSON, nullable=False)
     skill_requested = db.Column(JSON, nullable=False)
 
-    status = db.Column(db.Enum("pending", "accepted", "rejected", "completed"), nullable=False, default="pending")
+    status = db.Column(db.Enum("pending", "accepted", "rejected", "completed"), nullable=False, default="pending", index=True)
 
     proposed_date = db.Column(db.DateTime, nullable=True)
     meeting_location = db.Column(db.String(200), nullable=True)
     notes = db.Column(Text, nullable=True)
 
-    created_at = db.Column(db.DateTime, default=datetime.now(timezone(timedelta(hours=5, minutes=30))))
-    updated_at = db.Column(db.DateTime, default=datetime.now(timezone(timedelta(hours=5, minutes=30))), 
-                           onupdate=datetime.now(timezone(timedelta(hours=5, minutes=30))))
+    # Callables so each row gets its own timestamps; inbox paging and sync depend on them
+    created_at = db.Column(db.DateTime, default=now_ist)
+    updated_at = db.Column(db.DateTime, default=now_ist, onupdate=now_ist)
 
     sender = db.relationship('User', foreign_keys=[sender_id], back_populates='sent_requests')
     receiver = db.relationship('User', foreign_keys=[receiver_id], back_populates='received_requests')
@@ -153,9 +317,9 @@ class Feedback(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     uuid = db.Column(db.String(36), unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
 
-    swap_request_id = db.Column(db.Integer, db.ForeignKey('swap_requests.id'), nullable=False)
-    from_user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    to_user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    swap_request_id = db.Column(db.Integer, db.ForeignKey('swap_requests.id'), nullable=False, index=True)
+    from_user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    to_user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
 
     rating = db.Column(db.Integer, nullable=False)
     comment = db.Column(Text, nullable=True)
@@ -176,3 +340,53 @@ class Feedback(db.Model):
             'comment': self.comment,
             'createdAt': self.created_at.isoformat() if self.created_at else None
         }
+
+
+class UserRating(db.Model):
+    __tablename__ = "user_ratings"
+    __table_args__ = (
+        db.Index("ix_user_ratings_mean_count", "mean", "count"),
+    )
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    mean = db.Column(db.Float, nullable=False, default=0.0)
+
+    stars_1 = db.Column(db.Integer, nullable=False, default=0)
+    stars_2 = db.Column(db.Integer, nullable=False, default=0)
+    stars_3 = db.Column(db.Integer, nullable=False, default=0)
+    stars_4 = db.Column(db.Integer, nullable=False, default=0)
+    stars_5 = db.Column(db.Integer, nullable=False, default=0)
+
+    user = db.relationship('User', back_populates='rating_summary')
+
+    @classmethod
+    def rebuild_all(cls):
+        """Recompute every summary from the feedbacks table, in the caller's transaction"""
+        db.session.execute(delete(cls))
+        db.session.execute(insert(cls).from_select(
+            ["user_id", "count", "total", "mean", "stars_1", "stars_2", "stars_3", "stars_4", "stars_5"],
+            select(
+                Feedback.to_user_id,
+                func.count(),
+                func.sum(Feedback.rating),
+                func.avg(Feedback.rating),
+                *[func.sum(case((Feedback.rating == stars, 1), else_=0)) for stars in range(1, 6)]
+            ).group_by(Feedback.to_user_id)
+        ))
+
+    @staticmethod
+    def summarize(rating):
+        """Rating summary for API responses, including users nobody has rated yet"""
+        if rating is None:
+            return {'count': 0, 'average': None, 'histogram': {str(stars): 0 for stars in range(1, 6)}}
+        return rating.to_dict()
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'average': round(self.mean, 2),
+            'histogram': {str(stars): getattr(self, f"stars_{stars}") for stars in range(1, 6)}
+        }
@@ -0,0 +1,41 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timezone, timedelta
+import json
+
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def encode_cursor(*values):
+    """Encode the keyset position of the last row of a page as an opaque cursor"""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor, raising ValueError if it is malformed"""
+    try:
+        raw = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def parse_limit(value, default, maximum):
+    """Clamp a requested page size to 1..maximum, falling back to default"""
+    try:
+        limit = int(value) if value is not None else default
+    except (TypeError, ValueError):
+        limit = default
+    return max(1, min(limit, maximum))
+
+
+def parse_timestamp(value):
+    """Parse an ISO 8601 timestamp into the naive IST wall time the models store"""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(IST).replace(tzinfo=None)
+    return parsed
@@ -0,0 +1,117 @@
+from app import app, cache
+from application.routing import current_identity
+from flask import request
+from functools import wraps
+import math
+import threading
+import time
+
+
+# Refill every bucket and take from all of them only if each has a token, in
+# one round trip on the Redis clock so app servers may drift
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local tokens = {}
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local ts = tonumber(state[2]) or now
+    tokens[i] = math.min(capacity, (tonumber(state[1]) or capacity) + math.max(0, now - ts) * rate)
+    if tokens[i] < 1 then
+        retry_after = math.max(retry_after, (1 - tokens[i]) / rate)
+    end
+end
+for i, key in ipairs(KEYS) do
+    if retry_after == 0 then
+        tokens[i] = tokens[i] - 1
+    end
+    redis.call('HSET', key, 'tokens', tostring(tokens[i]), 'ts', tostring(now))
+    redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+end
+return tostring(retry_after)
+"""
+
+
+def parse_rate(value):
+    """Parse "N/seconds" into (capacity, tokens per second), or None when unset"""
+    if not value:
+        return None
+    count, seconds = value.split("/")
+    return int(count), int(count) / float(seconds)
+
+
+class TokenBuckets:
+    """Token buckets kept in the app cache.
+
+    With Redis each take is one atomic script call, shared by every
+    process. Other backends fall back to a read-modify-write under a
+    process-local lock, which is exact for SimpleCache since its state is
+    per process anyway.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._script = None
+
+    def take(self, keys, capacity, rate):
+        """Take one token from each bucket if every one has a token to give.
+
+        Returns 0 if allowed, else seconds until all of them do; a rejected
+        request takes nothing, so it cannot drain one bucket on another's behalf.
+        """
+        backend = cache.cache
+        if hasattr(backend, "_write_client"):
+            if self._script is None:
+                self._script = backend._write_client.register_script(TOKEN_BUCKET_LUA)
+            keys = [backend._get_prefix() + key for key in keys]
+            return float(self._script(keys=keys, args=[capacity, rate]))
+
+        with self._lock:
+            now = time.time()
+            buckets = {}
+            for key in keys:
+                tokens, ts = backend.get(key) or (capacity, now)
+                buckets[key] = min(capacity, tokens + max(0.0, now - ts) * rate)
+            retry_after = max(((1 - tokens) / rate for tokens in buckets.values() if tokens < 1), default=0.0)
+            for key, tokens in buckets.items():
+                if not retry_after:
+                    tokens -= 1
+                backend.set(key, (tokens, now), timeout=math.ceil(capacity / rate) + 1)
+            return retry_after
+
+
+token_buckets = TokenBuckets()
+
+
+def rate_limited(name):
+    """Limit the view per client IP and, when a JWT has been verified, per identity.
+
+    The client IP is the socket peer, or the forwarded address when
+    PROXY_FIX_X_FOR trusted proxies rewrite it (see app.py).
+
+    The limit comes from the RATE_LIMIT_<NAME> setting; an empty setting
+    disables it. Rejected requests get a 429 with Retry-After before the
+    view does any work.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            limit = parse_rate(app.config.get(f"RATE_LIMIT_{name.upper()}"))
+            if limit:
+                subjects = [f"ip:{request.remote_addr}"]
+                identity = current_identity()
+                if identity:
+                    subjects.append(f"user:{identity}")
+                retry_after = token_buckets.take([f"rate_limit:{name}:{subject}" for subject in subjects], *limit)
+                if retry_after > 0:
+                    return (
+                        {"message": "Too many requests. Please try again shortly."},
+                        429,
+                        {"Retry-After": str(math.ceil(retry_after))}
+                    )
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,145 @@
+from app import app, cache, jwt
+from application.caching import increment
+from flask_restful import abort
+from hashlib import blake2b
+import math
+import threading
+import time
+
+
+def revoked_key(jti):
+    return f"revoked_token:{jti}"
+
+
+def bucket_count_key(bucket):
+    return f"revoked_tokens:{bucket}:count"
+
+
+def bucket_entry_key(bucket, n):
+    return f"revoked_tokens:{bucket}:{n}"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, sized for capacity items at error_rate"""
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class TokenRevocations:
+    """Revoked access tokens, shared through the cache and screened by a per-process Bloom filter.
+
+    The cache holds one key per revoked jti until the token would have
+    expired anyway. Revocations are also appended to logs bucketed by
+    token expiry, numbered with an atomic counter, which every process
+    tails at most once per REVOCATION_SYNC_INTERVAL to keep its filter
+    current. A token that misses the filter is accepted without touching
+    the cache; only filter hits are confirmed against it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._seen = {}
+        self._pending = set()
+        self._built_at = 0.0
+        self._synced_at = 0.0
+
+    def _lifetime(self):
+        return int(app.config["JWT_ACCESS_TOKEN_EXPIRES"].total_seconds())
+
+    def _live_buckets(self, now):
+        width = app.config["REVOCATION_BUCKET_SECONDS"]
+        return range(int(now // width), int((now + self._lifetime()) // width) + 1)
+
+    def _rebuild(self, now):
+        self._filter = BloomFilter(app.config["REVOCATION_FILTER_CAPACITY"], app.config["REVOCATION_FILTER_ERROR_RATE"])
+        self._seen = {}
+        self._pending = set()
+        self._built_at = now
+
+    def _sync(self, now):
+        # An old or overfull filter only costs false positives, but those cost cache round trips
+        if (
+            self._filter is None
+            or now - self._built_at > self._lifetime()
+            or self._filter.count > app.config["REVOCATION_FILTER_CAPACITY"]
+        ):
+            self._rebuild(now)
+
+        buckets = self._live_buckets(now)
+        counts = cache.get_many(*[bucket_count_key(bucket) for bucket in buckets])
+        keys = set(self._pending)
+        for bucket, count in zip(buckets, counts):
+            seen = self._seen.get(bucket, 0)
+            if count and count > seen:
+                keys.update(bucket_entry_key(bucket, n) for n in range(seen + 1, count + 1))
+                self._seen[bucket] = count
+        self._seen = {bucket: seen for bucket, seen in self._seen.items() if bucket >= buckets.start}
+
+        keys = sorted(keys)
+        found = set()
+        for start in range(0, len(keys), 1000):
+            chunk = keys[start:start + 1000]
+            for key, jti in zip(chunk, cache.get_many(*chunk)):
+                if jti:
+                    self._filter.add(jti)
+                    found.add(key)
+        # The counter is bumped before the entry is written, so retry entries
+        # that were not there yet for as long as their bucket is live
+        self._pending = {
+            key for key in keys
+            if key not in found and int(key.split(":")[1]) >= buckets.start
+        }
+        self._synced_at = now
+
+    def revoke(self, jti, expires_at):
+        now = time.time()
+        timeout = max(1, int(expires_at - now) + 1)
+        cache.set(revoked_key(jti), True, timeout=timeout)
+        bucket = int(expires_at // app.config["REVOCATION_BUCKET_SECONDS"])
+        # The counter must outlive every entry in its bucket, or numbering would restart over live entries
+        bucket_end = (bucket + 1) * app.config["REVOCATION_BUCKET_SECONDS"]
+        n = increment(bucket_count_key(bucket), timeout=max(1, int(bucket_end - now) + 1))
+        cache.set(bucket_entry_key(bucket, n), jti, timeout=timeout)
+        with self._lock:
+            if self._filter is None:
+                self._sync(now)
+            self._filter.add(jti)
+
+    def is_revoked(self, jti):
+        now = time.time()
+        with self._lock:
+            if self._filter is None or now - self._synced_at >= app.config["REVOCATION_SYNC_INTERVAL"]:
+                self._sync(now)
+            probable = jti in self._filter
+        return probable and bool(cache.get(revoked_key(jti)))
+
+
+token_revocations = TokenRevocations()
+
+
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    # Abort here rather than returning True: flask-restful would turn the
+    # RevokedTokenError raised by flask_jwt_extended into a logged 500
+    if token_revocations.is_revoked(jwt_payload["jti"]):
+        abort(401, message="Token has been revoked")
+    return False
+
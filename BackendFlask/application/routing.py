@@ -0,0 +1,53 @@
+from app import app, cache
+from flask import g, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from functools import wraps
+
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def sticky_key(identity):
+    return f"primary_until:{identity}"
+
+
+def current_identity():
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        return None
+
+
+def read_from_replica(func):
+    """Route the view's reads to the replica, unless the caller wrote within DB_REPLICA_MAX_LAG"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            verify_jwt_in_request(optional=True)
+        except Exception:
+            pass
+        identity = current_identity()
+        g.use_replica = not (identity and cache.get(sticky_key(identity)))
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def stick_to(identity):
+    """Pin identity to the primary after this request, for writes made before the caller holds a token"""
+    g.primary_identity = str(identity)
+
+
+def replica_reads():
+    """Number of statements this request has sent to the replica so far"""
+    return g.get("replica_reads", 0)
+
+
+@app.after_request
+def stick_to_primary(response):
+    # Read-your-writes: after a successful mutation, the caller reads from the
+    # primary until the replica has had time to catch up
+    if request.method in WRITE_METHODS and response.status_code < 400 and app.config["SQLALCHEMY_BINDS"]:
+        identity = g.get("primary_identity") or current_identity()
+        if identity:
+            cache.set(sticky_key(identity), True, timeout=app.config["DB_REPLICA_MAX_LAG"])
+    return response
@@ -0,0 +1,189 @@
+from application.indexing import SkillIndex, register_index
+from application.taxonomy import resolve, term_key, tokenize
+from collections import defaultdict
+import heapq
+
+
+FIELD_WEIGHTS = {"name": 3.0, "category": 1.5, "description": 1.0}
+
+# Someone who offers a skill ranks above someone who only wants it
+KIND_WEIGHTS = {"offered": 1.0, "wanted": 0.8}
+
+# Relative score of an exact token hit versus a prefix or infix hit
+EXACT, PREFIX, INFIX = 1.0, 0.75, 0.5
+
+# Cap on vocabulary terms a partial query token may expand to
+MAX_EXPANSIONS = 50
+
+
+def trigrams(token):
+    padded = f"^{token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SkillSearchIndex(SkillIndex):
+    """Inverted index from skill tokens to users, with a trigram index over the vocabulary.
+
+    Postings are kept per user at the user's best weight for the token and
+    bucketed into weight tiers, so results can be read off in score order
+    and a search stops as soon as the top `limit` users are settled instead
+    of scoring every matching skill. Partial tokens are expanded to
+    vocabulary terms through their trigrams.
+    """
+
+    version_key = "skill_search_index:version"
+
+    def clear(self):
+        self.docs = {}
+        self.matches = defaultdict(dict)
+        self.postings = defaultdict(dict)
+        self.tiers = defaultdict(lambda: defaultdict(set))
+        self.grams = defaultdict(set)
+
+    def _set_weight(self, token, user_id, weight):
+        postings = self.postings[token]
+        tiers = self.tiers[token]
+        previous = postings.get(user_id)
+        if previous == weight:
+            return
+        if previous is not None:
+            tiers[previous].discard(user_id)
+            if not tiers[previous]:
+                del tiers[previous]
+        if weight is None:
+            del postings[user_id]
+        else:
+            postings[user_id] = weight
+            tiers[weight].add(user_id)
+
+    def add(self, entry):
+        weights = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(getattr(entry, field)):
+                weights[token] = max(weights.get(token, 0.0), weight * KIND_WEIGHTS[entry.kind])
+        # The canonical term counts as part of the name, so "ReactJS" is found by "react"
+        for token in tokenize(term_key(entry.name)):
+            weights[token] = max(weights.get(token, 0.0), FIELD_WEIGHTS["name"] * KIND_WEIGHTS[entry.kind])
+        key = (entry.kind, entry.id)
+        self.docs[key] = (entry.user_id, weights)
+        for token, weight in weights.items():
+            if token not in self.postings:
+                for gram in trigrams(token):
+                    self.grams[gram].add(token)
+            matches = self.matches[(token, entry.user_id)]
+            matches[key] = weight
+            self._set_weight(token, entry.user_id, max(matches.values()))
+
+    def remove(self, kind, skill_id):
+        doc = self.docs.pop((kind, skill_id), None)
+        if doc is None:
+            return
+        user_id, weights = doc
+        for token in weights:
+            matches = self.matches[(token, user_id)]
+            matches.pop((kind, skill_id), None)
+            if matches:
+                self._set_weight(token, user_id, max(matches.values()))
+                continue
+            del self.matches[(token, user_id)]
+            self._set_weight(token, user_id, None)
+            if not self.postings[token]:
+                del self.postings[token]
+                del self.tiers[token]
+                for gram in trigrams(token):
+                    self.grams[gram].discard(token)
+                    if not self.grams[gram]:
+                        del self.grams[gram]
+
+    def expand(self, token):
+        """Vocabulary terms matching a query token, with their match quality"""
+        matches = {}
+        if token in self.postings:
+            matches[token] = EXACT
+        if len(token) < 2:
+            return matches
+
+        # "^py" alone covers two-character prefixes, longer tokens need all their trigrams
+        query_grams = trigrams(token) - {f"{token[-2:]}$"}
+        if len(token) > 2:
+            query_grams = {g for g in query_grams if "^" not in g}
+        candidates = None
+        for gram in sorted(query_grams, key=lambda g: len(self.grams.get(g, ()))):
+            terms = self.grams.get(gram)
+            if not terms:
+                return matches
+            candidates = set(terms) if candidates is None else candidates & terms
+            if not candidates:
+                return matches
+
+        partial = [term for term in candidates if term != token and token in term]
+        partial.sort(key=len)
+        for term in partial[:MAX_EXPANSIONS]:
+            matches[term] = (PREFIX if term.startswith(token) else INFIX) * len(token) / len(term)
+        return matches
+
+    def _tiers(self, expansions):
+        """(score, users) tiers for an expanded query token, best first"""
+        tiers = [
+            (weight * quality, users)
+            for term, quality in expansions.items()
+            for weight, users in self.tiers[term].items()
+        ]
+        tiers.sort(key=lambda tier: -tier[0])
+        return tiers
+
+    def _score(self, expansions, user_id):
+        best = 0.0
+        for term, quality in expansions.items():
+            weight = self.postings[term].get(user_id)
+            if weight is not None and weight * quality > best:
+                best = weight * quality
+        return best
+
+    def search(self, query, limit, allowed=None):
+        """Return up to limit (user_id, score) pairs matching every token of query, best first, only from allowed when given"""
+        # A query that is an alias as a whole searches for its canonical term
+        tokens = list(dict.fromkeys(tokenize(resolve(query))))
+        if not tokens:
+            return []
+
+        self.ensure_current()
+        with self._lock:
+            expansions = [self.expand(token) for token in tokens]
+            if not all(expansions):
+                return []
+
+            # Walk the most selective token in score order and probe the others
+            expansions.sort(key=lambda e: sum(len(self.postings[term]) for term in e))
+            driver, others = expansions[0], expansions[1:]
+            ceiling = sum(self._tiers(e)[0][0] for e in others)
+
+            top = []
+            seen = set()
+            for score, users in self._tiers(driver):
+                if len(top) >= limit and top[0][0] >= score + ceiling:
+                    break
+                for user_id in users:
+                    if len(top) >= limit and top[0][0] >= score + ceiling:
+                        break
+                    if user_id in seen or (allowed is not None and user_id not in allowed):
+                        continue
+                    seen.add(user_id)
+                    total = score
+                    for expansion in others:
+                        other = self._score(expansion, user_id)
+                        if not other:
+                            break
+                        total += other
+                    else:
+                        if len(top) < limit:
+                            heapq.heappush(top, (total, -user_id))
+                        elif total > top[0][0]:
+                            heapq.heapreplace(top, (total, -user_id))
+
+        results = [(-user_id, total) for total, user_id in top]
+        results.sort(key=lambda item: (-item[1], item[0]))
+        return results
+
+
+skill_search = register_index(SkillSearchIndex())
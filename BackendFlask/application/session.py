@@ -0,0 +1,30 @@
+from flask import g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql import Select
+
+
+REPLICA_BIND = "replica"
+
+
+class RoutingSession(Session):
+    """Session that sends SELECTs to the replica bind while a view has opted in.
+
+    Views opt in through application.routing.read_from_replica. Statements
+    carrying the "primary" execution option, and anything issued while the
+    session holds pending changes, always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and isinstance(clause, Select)
+            and has_request_context()
+            and g.get("use_replica")
+            and not clause.get_execution_options().get("primary")
+            and not (self.new or self.dirty or self.deleted)
+        ):
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                g.replica_reads = g.get("replica_reads", 0) + 1
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,176 @@
+from app import db
+from application import availability as week
+from application import geo
+from application.bulk import chunked, after_bulk_write
+from application.models import User, Skill, SkillWanted, SkillTerm, SwapRequest, Feedback, UserRating, now_ist
+from datetime import timedelta
+from itertools import accumulate
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+import bisect
+import random
+
+
+SKILL_BASES = [
+    ("Python", "Technology"), ("React", "Technology"), ("Node.js", "Technology"), ("SQL", "Technology"),
+    ("Machine Learning", "Technology"), ("Data Visualization", "Technology"), ("Rust", "Technology"),
+    ("UI/UX Design", "Design"), ("Graphic Design", "Design"), ("Adobe Photoshop", "Design"),
+    ("Illustration", "Design"), ("Digital Marketing", "Marketing"), ("SEO", "Marketing"),
+    ("Social Media Marketing", "Marketing"), ("Copywriting", "Writing"), ("Content Writing", "Writing"),
+    ("Technical Writing", "Writing"), ("Statistics", "Mathematics"), ("Calculus", "Mathematics"),
+    ("Guitar", "Music"), ("Piano", "Music"), ("Music Production", "Music"), ("Photography", "Art"),
+    ("Painting", "Art"), ("Spanish", "Languages"), ("French", "Languages"), ("Japanese", "Languages"),
+    ("Cooking", "Lifestyle"), ("Yoga", "Fitness"), ("Public Speaking", "Business"),
+]
+
+SKILL_VARIANTS = ["", "Basics", "Advanced", "for Beginners", "Fundamentals"]
+
+LEVELS = ["beginner", "intermediate", "advanced", "expert"]
+
+LOCATIONS = [
+    "New York, NY", "Los Angeles, CA", "Chicago, IL", "San Francisco, CA", "Austin, TX", "Seattle, WA",
+    "Boston, MA", "Mumbai, MH", "Bengaluru, KA", "Delhi, DL", "London, UK", "Berlin, DE",
+]
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+STATUSES = (["pending", "accepted", "rejected", "completed"], [0.4, 0.2, 0.1, 0.3])
+
+RATINGS = ([1, 2, 3, 4, 5], [0.03, 0.05, 0.12, 0.35, 0.45])
+
+
+class Zipf:
+    """Samples indexes 0..n-1 with probability proportional to 1 / (rank + 1) ** skew"""
+
+    def __init__(self, n, skew, rng):
+        self.rng = rng
+        self.cumulative = list(accumulate(1.0 / (rank + 1) ** skew for rank in range(n)))
+
+    def sample(self):
+        return bisect.bisect(self.cumulative, self.rng.random() * self.cumulative[-1])
+
+
+def generate(users=1000, skills_per_user=4, swaps=5000, feedback_ratio=0.5, skew=1.1, seed=42, chunk_size=5000, log=print):
+    """Insert a reproducible synthetic population built on the application models.
+
+    Skill popularity and swap activity follow Zipf distributions, so a few
+    skills and users dominate the way they do in real directories. Rows
+    are written with batched executemany inserts, chunk_size at a time.
+    """
+    rng = random.Random(seed)
+    now = now_ist().replace(tzinfo=None)
+    password_hash = generate_password_hash("password123")
+
+    skill_names = [(f"{name} {variant}".strip(), category) for name, category in SKILL_BASES for variant in SKILL_VARIANTS]
+    rng.shuffle(skill_names)
+    skill_popularity = Zipf(len(skill_names), skew, rng)
+    user_activity = Zipf(users, skew, rng)
+
+    placed = {location: geo.locate(location) for location in LOCATIONS}
+
+    def user_rows():
+        for n in range(users):
+            start = rng.choice([8, 9, 10, 13, 17, 18])
+            slots = [
+                {"day": day, "startTime": f"{start:02d}:00", "endTime": f"{(start + rng.choice([2, 4, 8])) % 24:02d}:00"}
+                for day in rng.sample(DAYS, rng.randint(1, 5))
+            ]
+            location = rng.choice(LOCATIONS)
+            yield {
+                "name": f"Synthetic User {n}",
+                "email": f"user{n}.seed{seed}@synthetic.example",
+                "password_hashed": password_hash,
+                "location": location,
+                **placed[location],
+                "is_public": rng.random() < 0.9,
+                "availability": slots,
+                "availability_mask": week.to_bytes(week.week_mask(slots)),
+                "role": "user",
+                "status": "verified",
+                "created_at": now - timedelta(days=rng.uniform(0, 730)),
+            }
+
+    user_ids = []
+    for chunk in chunked(user_rows(), chunk_size):
+        user_ids.extend(db.session.scalars(
+            insert(User).returning(User.id, sort_by_parameter_order=True), chunk
+        ).all())
+        log(f"users: {len(user_ids)}/{users}")
+
+    def skill_rows(level_key):
+        for user_id in user_ids:
+            for _ in range(max(1, int(rng.expovariate(1 / skills_per_user)))):
+                name, category = skill_names[skill_popularity.sample()]
+                yield {
+                    "user_id": user_id,
+                    "name": name,
+                    "description": f"{name} sessions, {rng.choice(['online', 'in person', 'flexible'])}",
+                    "category": category,
+                    level_key: rng.choice(LEVELS),
+                    "created_at": now - timedelta(days=rng.uniform(0, 365)),
+                }
+
+    for model, level_key in ((Skill, "level"), (SkillWanted, "level_needed")):
+        written = 0
+        for chunk in chunked(skill_rows(level_key), chunk_size):
+            db.session.execute(insert(model), SkillTerm.assign(chunk))
+            written += len(chunk)
+        log(f"{model.__tablename__}: {written}")
+
+    completed = []
+
+    def swap_rows():
+        for n in range(swaps):
+            sender_index = user_activity.sample()
+            receiver_index = user_activity.sample()
+            if receiver_index == sender_index:
+                receiver_index = (sender_index + 1) % len(user_ids)
+            sender, receiver = user_ids[sender_index], user_ids[receiver_index]
+            created = now - timedelta(days=rng.uniform(0, 365))
+            offered, _ = skill_names[skill_popularity.sample()]
+            requested, _ = skill_names[skill_popularity.sample()]
+            yield {
+                "sender_id": sender,
+                "receiver_id": receiver,
+                "skill_offered": {"name": offered},
+                "skill_requested": {"name": requested},
+                "status": rng.choices(*STATUSES)[0],
+                "created_at": created,
+                "updated_at": created + timedelta(hours=rng.uniform(0, 72)),
+            }
+
+    written = 0
+    for chunk in chunked(swap_rows(), chunk_size):
+        ids = db.session.scalars(
+            insert(SwapRequest).returning(SwapRequest.id, sort_by_parameter_order=True), chunk
+        ).all()
+        completed.extend(
+            (swap_id, row["sender_id"], row["receiver_id"], row["updated_at"])
+            for swap_id, row in zip(ids, chunk) if row["status"] == "completed"
+        )
+        written += len(chunk)
+        log(f"swap_requests: {written}/{swaps}")
+
+    def feedback_rows():
+        for swap_id, sender, receiver, finished in completed:
+            if rng.random() < feedback_ratio:
+                yield {
+                    "swap_request_id": swap_id,
+                    "from_user_id": sender,
+                    "to_user_id": receiver,
+                    "rating": rng.choices(*RATINGS)[0],
+                    "comment": "Synthetic feedback",
+                    "created_at": finished + timedelta(hours=rng.uniform(1, 48)),
+                }
+
+    written = 0
+    for chunk in chunked(feedback_rows(), chunk_size):
+        db.session.execute(insert(Feedback), chunk)
+        written += len(chunk)
+    log(f"feedbacks: {written}")
+
+    UserRating.rebuild_all()
+    db.session.commit()
+
+    after_bulk_write(["users", "skills", "skills_wanted", "swap_requests", "feedbacks"])
+    return user_ids
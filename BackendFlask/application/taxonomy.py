@@ -0,0 +1,73 @@
+from functools import lru_cache
+import csv
+import os
+import re
+
+
+SEED_PATH = os.path.join(os.path.dirname(__file__), "skill_terms.csv")
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9+#]+")
+
+# Words that qualify a skill rather than name it: "Python Basics", "Advanced
+# Python" and "Python for Beginners" are all Python, the level lives in its own column
+QUALIFIERS = {
+    "basic", "basics", "fundamentals", "beginner", "beginners", "intermediate", "advanced", "expert",
+    "intro", "introduction", "to", "for", "development", "programming", "skills", "course", "101",
+}
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+def normalize(text):
+    """Normalized skill text, so that "React  Development" and "react-development" coincide"""
+    return " ".join(tokenize(text))
+
+
+@lru_cache(maxsize=1)
+def seeds():
+    """(key, name, category) of every term shipped in skill_terms.csv"""
+    with open(SEED_PATH, newline="", encoding="utf-8") as f:
+        return [(normalize(row["name"]), row["name"], row["category"] or None) for row in csv.DictReader(f)]
+
+
+@lru_cache(maxsize=1)
+def aliases():
+    """Map of normalized seed names and aliases to their term key"""
+    table = {}
+    with open(SEED_PATH, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            key = normalize(row["name"])
+            table[key] = key
+            for alias in filter(None, row["aliases"].split("|")):
+                table.setdefault(normalize(alias), key)
+    return table
+
+
+def resolve(text):
+    """The term key text names outright, or its normalized form when it is not a known alias"""
+    normalized = normalize(text)
+    return aliases().get(normalized, normalized)
+
+
+def term_key(name):
+    """Key of the canonical term for a skill name: "ReactJS", "react" and "React Development" all give "react".
+
+    Names that are not aliases themselves are tried again without
+    qualifier words. Returns "" for names without any word characters.
+    """
+    words = tokenize(name)
+    table = aliases()
+    key = " ".join(words)
+    if key in table:
+        return table[key]
+    core = " ".join(word for word in words if word not in QUALIFIERS)
+    if not core:
+        return key
+    return table.get(core, core)
+
+
+def term_name(key, name):
+    """Display name for a term first seen as name"""
+    return name.strip() if normalize(name) == key else key.title()
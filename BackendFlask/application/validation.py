@@ -0,0 +1,131 @@
+from flask import request
+from flask_restful import abort
+
+
+TRUE_STRINGS = {"true", "1", "yes", "on"}
+FALSE_STRINGS = {"false", "0", "no", "off"}
+TYPE_NAMES = {str: "a string", int: "an integer", bool: "a boolean", dict: "an object", list: "a list"}
+
+
+class Invalid(ValueError):
+    def __init__(self, field, message):
+        super().__init__(message)
+        self.field = field
+        self.message = message
+
+
+def convert_str(value):
+    if isinstance(value, str):
+        return value
+    raise ValueError
+
+
+def convert_required_str(value):
+    if isinstance(value, str) and value.strip():
+        return value
+    raise ValueError
+
+
+def convert_int(value):
+    # bool is an int subclass, but true is not a rating
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return int(value)
+    raise ValueError
+
+
+def convert_bool(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in TRUE_STRINGS:
+            return True
+        if lowered in FALSE_STRINGS:
+            return False
+    raise ValueError
+
+
+def convert_instance(kind):
+    def convert(value):
+        if isinstance(value, kind):
+            return value
+        raise ValueError
+    return convert
+
+
+CONVERTERS = {str: convert_str, int: convert_int, bool: convert_bool}
+
+
+class Field:
+    """One body field: its type, whether it is required, a default and allowed values"""
+
+    __slots__ = ("type", "required", "default", "choices", "help")
+
+    def __init__(self, type=str, required=False, default=None, choices=None, help=None):
+        self.type = type
+        self.required = required
+        self.default = default
+        self.choices = frozenset(choices) if choices is not None else None
+        self.help = help
+
+
+class Schema:
+    """Validator for a request body, compiled once from its fields.
+
+    Every check and error message is worked out up front, so parsing a
+    request is a single pass over the fields. Values must already have
+    the declared type in JSON bodies; form bodies carry strings, which
+    are converted. Errors abort with a 400 shaped like reqparse's,
+    {"message": {field: error}}, reporting the first bad field.
+    """
+
+    def __init__(self, **fields):
+        self._fields = tuple(self._compile(name, field) for name, field in fields.items())
+
+    @staticmethod
+    def _compile(name, field):
+        convert = CONVERTERS.get(field.type) or convert_instance(field.type)
+        missing = field.help or f"{name} is required"
+        if field.type is str and field.required:
+            # A blank required string is as good as a missing one
+            convert = convert_required_str
+        wrong_type = field.help or f"{name} must be {TYPE_NAMES.get(field.type, 'a ' + field.type.__name__)}"
+        wrong_choice = field.help or f"{name} must be one of {', '.join(sorted(map(str, field.choices or ())))}"
+        return name, field.required, field.default, convert, field.choices, missing, wrong_type, wrong_choice
+
+    def validate(self, data):
+        """Return the validated values of data, every declared field present; raise Invalid on the first bad one"""
+        values = {}
+        for name, required, default, convert, choices, missing, wrong_type, wrong_choice in self._fields:
+            value = data.get(name)
+            # Forms cannot leave a field out, only send it empty
+            if value is None or value == "":
+                if required:
+                    raise Invalid(name, missing)
+                values[name] = default
+                continue
+            try:
+                value = convert(value)
+            except ValueError:
+                raise Invalid(name, missing if isinstance(value, str) and not value.strip() else wrong_type)
+            if choices is not None and value not in choices:
+                raise Invalid(name, wrong_choice)
+            values[name] = value
+        return values
+
+    def parse(self):
+        """Validate the JSON body, or the form body for non-JSON requests"""
+        if request.is_json:
+            data = request.get_json(silent=True)
+            if data is None:
+                data = {}
+            elif not isinstance(data, dict):
+                abort(400, message="Expected a JSON object")
+        else:
+            data = request.form
+        try:
+            return self.validate(data)
+        except Invalid as e:
+            abort(400, message={e.field: e.message})
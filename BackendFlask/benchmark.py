@@ -0,0 +1,239 @@
+"""Per-endpoint load benchmark.
+
+Seeds a local SQLite database with the synthetic generator, then drives
+every route registered in app.py through the WSGI test client from a
+pool of threads and reports throughput and p50/p95/p99 latency per
+endpoint. No external services are needed.
+
+    python benchmark.py --users 2000 --swaps 10000 --requests 200 --concurrency 8
+    python benchmark.py --db bench.sqlite3 --no-seed --only getallusers,searchusers
+    python benchmark.py --json results.json
+"""
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import io
+import json
+import os
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--db", help="SQLite file to use; a scratch file by default")
+    parser.add_argument("--no-seed", action="store_true", help="Reuse the data already in --db")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--skills-per-user", type=int, default=4)
+    parser.add_argument("--swaps", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--only", help="Comma-separated endpoint names to run")
+    parser.add_argument("--json", help="Also write results to this file")
+    return parser.parse_args()
+
+
+args = parse_args()
+scratch = tempfile.mkdtemp(prefix="skillxchange-bench-")
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.abspath(args.db or os.path.join(scratch, 'bench.sqlite3'))}"
+os.environ["PROFILE_PHOTO_FOLDER"] = os.path.join(scratch, "profile_photos")
+os.environ.setdefault("CACHE_TYPE", "SimpleCache")
+for name in ("RATE_LIMIT_LOGIN", "RATE_LIMIT_SEARCH", "RATE_LIMIT_USERS"):
+    os.environ.setdefault(name, "")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-jwt-secret-key-0123456789")
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import select
+
+from app import app, db
+from application.media import store_profile_photo
+from application.models import User
+from application.synthetic import generate
+
+
+def png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+# A 1x1 white PNG
+PNG = b"\x89PNG\r\n\x1a\n" + png_chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0)) \
+    + png_chunk(b"IDAT", zlib.compress(b"\x00\xff\xff\xff")) + png_chunk(b"IEND", b"")
+
+# Plain copies of the rows the worker threads need, so they never lazy-load
+BenchUser = namedtuple("BenchUser", "id uuid email token")
+
+
+def token_for(user):
+    return create_access_token(
+        identity=str(user.id),
+        additional_claims={"uuid": user.uuid, "name": user.name, "email": user.email, "role": user.role or "user"}
+    )
+
+
+class Context:
+    """Users, tokens and pre-created rows the scenarios draw on"""
+
+    def __init__(self, requests):
+        rng = random.Random(args.seed)
+        users = db.session.scalars(
+            select(User).filter(User.is_public == True, User.email.like("%@synthetic.example")).limit(200)
+        ).all()
+        if len(users) < 2:
+            sys.exit("Need at least two synthetic users; run without --no-seed")
+        self.users = [BenchUser(user.id, user.uuid, user.email, token_for(user)) for user in users]
+        # Logging out revokes the token, so each logout gets its own
+        self.logout_tokens = [token_for(users[0]) for _ in range(requests)]
+        self.rng = rng
+        self.run = int(time.time())
+        self.client = app.test_client()
+        self.me = self.users[0]
+        self.other = self.users[1]
+        self.photo, _ = store_profile_photo(io.BytesIO(PNG))
+
+        self.offered = [self.post_skill("offered", n)["id"] for n in range(requests)]
+        self.wanted = [self.post_skill("wanted", n)["id"] for n in range(requests)]
+        self.swaps = [self.post_swap(n)["id"] for n in range(requests * 2)]
+
+    def auth(self, user=None):
+        return {"Authorization": f"Bearer {(user or self.me).token}"}
+
+    def post_skill(self, kind, n):
+        return self.client.post(f"/api/skills/{kind}", headers=self.auth(), json={
+            "name": f"Benchmark Skill {n}", "description": "Benchmark"
+        }).json["skill"]
+
+    def post_swap(self, n):
+        return self.client.post("/api/swap-requests", headers=self.auth(), json={
+            "receiverId": self.other.uuid, "skillOffered": {"name": "Python"}, "skillRequested": {"name": f"Skill {n}"}
+        }).json["request"]
+
+    def any_user(self):
+        return self.rng.choice(self.users)
+
+
+SCENARIOS = {
+    "registeruser": lambda ctx, i: ("post", "/api/auth/register", {"json": {
+        "name": "Bench", "email": f"bench{i}.{ctx.run}@example.com", "password": "password123"
+    }}),
+    "loginuser": lambda ctx, i: ("post", "/api/auth/login", {"json": {
+        "email": ctx.any_user().email, "password": "password123"
+    }}),
+    "logoutuser": lambda ctx, i: ("post", "/api/auth/logout", {"headers": {"Authorization": f"Bearer {ctx.logout_tokens[i]}"}}),
+    "getcurrentuser": lambda ctx, i: ("get", "/api/auth/me", {"headers": ctx.auth(ctx.any_user())}),
+    "getallusers": lambda ctx, i: ("get", "/api/users?limit=50", {"headers": ctx.auth()}),
+    "getuserbyid": lambda ctx, i: ("get", f"/api/users/{ctx.any_user().uuid}", {}),
+    "searchusers": lambda ctx, i: ("get", f"/api/users/search?skill={ctx.rng.choice(['python', 'design', 'mark', 'guitar basics', 'seo'])}", {}),
+    "gettopratedusers": lambda ctx, i: ("get", "/api/users/top-rated", {}),
+    "updateuserprofile": lambda ctx, i: ("put", "/api/users/profile", {"headers": ctx.auth(), "json": {"name": f"Bench {i}"}}),
+    "updateuseravailability": lambda ctx, i: ("put", "/api/users/availability", {"headers": ctx.auth(), "json": {
+        "availability": [{"day": "Monday", "startTime": "09:00", "endTime": "17:00"}]
+    }}),
+    "togglepublicprofile": lambda ctx, i: ("put", "/api/users/toggle-public", {"headers": ctx.auth(ctx.other)}),
+    "addskilloffered": lambda ctx, i: ("post", "/api/skills/offered", {"headers": ctx.auth(ctx.other), "json": {
+        "name": f"Offered {i}", "description": "Benchmark"
+    }}),
+    "addskillwanted": lambda ctx, i: ("post", "/api/skills/wanted", {"headers": ctx.auth(ctx.other), "json": {
+        "name": f"Wanted {i}", "description": "Benchmark"
+    }}),
+    "removeskilloffered": lambda ctx, i: ("delete", f"/api/skills/offered/{ctx.offered[i]}", {"headers": ctx.auth()}),
+    "removeskillwanted": lambda ctx, i: ("delete", f"/api/skills/wanted/{ctx.wanted[i]}", {"headers": ctx.auth()}),
+    "batchupdateskills": lambda ctx, i: ("post", "/api/skills/batch", {"headers": ctx.auth(ctx.other), "json": {
+        "offered": {"add": [{"name": f"Batch Offered {i}.{n}", "description": "Benchmark"} for n in range(5)]},
+        "wanted": {"add": [{"name": f"Batch Wanted {i}.{n}", "description": "Benchmark"} for n in range(5)]}
+    }}),
+    "getmatches": lambda ctx, i: ("get", "/api/matches", {"headers": ctx.auth(ctx.any_user())}),
+    "getswaprequests": lambda ctx, i: ("get", "/api/swap-requests?limit=50", {"headers": ctx.auth(ctx.any_user())}),
+    "createswaprequest": lambda ctx, i: ("post", "/api/swap-requests", {"headers": ctx.auth(ctx.other), "json": {
+        "receiverId": ctx.me.uuid, "skillOffered": {"name": "Go"}, "skillRequested": {"name": "Rust"}
+    }}),
+    "updateswaprequeststatus": lambda ctx, i: ("put", f"/api/swap-requests/{ctx.swaps[i]}/status", {
+        "headers": ctx.auth(ctx.other), "json": {"status": "completed"}
+    }),
+    "addfeedback": lambda ctx, i: ("post", "/api/feedback", {"headers": ctx.auth(), "json": {
+        "swapRequestId": ctx.swaps[i], "toUserId": ctx.other.uuid, "rating": ctx.rng.randint(1, 5)
+    }}),
+    "deleteswaprequest": lambda ctx, i: ("delete", f"/api/swap-requests/{ctx.swaps[len(ctx.swaps) // 2 + i]}", {
+        "headers": ctx.auth()
+    }),
+    "suggestswapslots": lambda ctx, i: ("get", f"/api/swap-requests/{ctx.swaps[0]}/slots?duration=60", {"headers": ctx.auth()}),
+    "getuserfeedback": lambda ctx, i: ("get", f"/api/feedback/user/{ctx.other.uuid}", {}),
+    "getprofilephoto": lambda ctx, i: ("get", f"/static/uploads/profile_photos/{ctx.photo}", {}),
+    "eventstream": lambda ctx, i: ("get", "/api/stream", {"headers": ctx.auth(ctx.any_user())}),
+    "metrics": lambda ctx, i: ("get", "/metrics", {}),
+}
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_scenario(ctx, scenario, requests, concurrency):
+    local = threading.local()
+
+    def call(i):
+        if not hasattr(local, "client"):
+            local.client = app.test_client()
+        method, url, kwargs = scenario(ctx, i)
+        started = time.perf_counter()
+        response = getattr(local.client, method)(url, **kwargs)
+        elapsed = time.perf_counter() - started
+        response.close()
+        return elapsed, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(requests)))
+    return summarize(results, requests, time.perf_counter() - started)
+
+
+def summarize(results, requests, wall):
+    latencies = sorted(elapsed for elapsed, _ in results)
+    return {
+        "requests": requests,
+        "errors": sum(1 for _, status in results if status >= 400),
+        "throughput": requests / wall,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def main():
+    with app.app_context():
+        if not args.no_seed:
+            generate(users=args.users, skills_per_user=args.skills_per_user, swaps=args.swaps, seed=args.seed, log=lambda _: None)
+        ctx = Context(args.requests)
+
+        endpoints = {rule.endpoint for rule in app.url_map.iter_rules() if rule.endpoint != "static"}
+        for endpoint in sorted(endpoints - set(SCENARIOS)):
+            print(f"warning: no scenario for {endpoint}", file=sys.stderr)
+        selected = args.only.split(",") if args.only else [name for name in SCENARIOS if name in endpoints]
+
+        results = {}
+        print(f"{'endpoint':<26}{'reqs':>6}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name in selected:
+            result = run_scenario(ctx, SCENARIOS[name], args.requests, args.concurrency)
+            results[name] = result
+            print(
+                f"{name:<26}{result['requests']:>6}{result['errors']:>8}{result['throughput']:>10.1f}"
+                f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
@@ -0,0 +1,168 @@
+"""Query plan regression check.
+
+Drives every API route against a scratch SQLite database seeded by
+init_db, captures the SQL each endpoint issues, and runs it through
+EXPLAIN QUERY PLAN. Exits non-zero if any statement falls back to a full
+table scan, walks a whole index without a search predicate (unless the
+index delivers the ORDER BY of a LIMIT query, which stops early), sorts
+in a temp b-tree on a hot read endpoint, or if a registered route was
+not exercised.
+
+    python check_query_plans.py [-v]
+"""
+from collections import defaultdict
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+SCRATCH = tempfile.mkdtemp(prefix="skillxchange-plans-")
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(SCRATCH, 'plans.sqlite3')}"
+os.environ["PROFILE_PHOTO_FOLDER"] = os.path.join(SCRATCH, "profile_photos")
+os.environ["CACHE_TYPE"] = "NullCache"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ.setdefault("SECRET_KEY", "query-plans")
+os.environ.setdefault("JWT_SECRET_KEY", "query-plans-jwt-secret-key-0123456789")
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+from app import app, db
+
+
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+INDEX_SCAN = re.compile(r"^SCAN (\w+) USING (?:COVERING )?INDEX \w+$")
+SORT = re.compile(r"^USE TEMP B-TREE FOR .*ORDER BY$")
+LIMITED = re.compile(r"\bLIMIT\b", re.IGNORECASE)
+
+# Read endpoints on every page load, where a per-request sort grows with the data
+HOT_ENDPOINTS = {
+    "getallusers", "getuserbyid", "searchusers", "gettopratedusers", "getmatches",
+    "getswaprequests", "getcurrentuser", "getuserfeedback",
+}
+
+captured = defaultdict(list)
+
+
+def capture(conn, cursor, statement, parameters, context, executemany):
+    # In-process skill index builds read whole tables on purpose
+    if context.execution_options.get("index_rebuild"):
+        return
+    if has_request_context() and not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+        captured[request.endpoint].append((statement, parameters))
+
+
+def login(client, email):
+    response = client.post("/api/auth/login", json={"email": email, "password": "password123"})
+    return {"Authorization": f"Bearer {response.json['token']}"}
+
+
+def exercise(client):
+    """Call every route at least once, including the paginated and filtered variants"""
+    client.post("/api/auth/register", json={"name": "Plan Check", "email": "plans@example.com", "password": "password123"})
+    john = login(client, "john@example.com")
+    sarah = login(client, "sarah@example.com")
+    client.get("/api/auth/me", headers=john)
+    client.post("/api/auth/logout", headers=john)
+
+    page = client.get("/api/users?limit=2", headers=john).json
+    client.get(f"/api/users?limit=2&after={page['next']}", headers=john)
+    client.get("/api/users?near=San%20Francisco&radius_km=100", headers=john)
+    sarah_id = client.get("/api/auth/me", headers=sarah).json["user"]["id"]
+    client.get(f"/api/users/{sarah_id}")
+    client.get("/api/users/search?skill=design")
+    client.get("/api/users/search?skill=design&min_overlap=60", headers=john)
+    client.get("/api/users/search?skill=design&near=Austin,%20TX&radius_km=50")
+    client.get("/api/users/top-rated?min_count=1")
+    client.put("/api/users/profile", headers=john, json={"name": "John Developer"})
+    client.put("/api/users/availability", headers=john, json={"availability": []})
+    client.put("/api/users/toggle-public", headers=john)
+    client.put("/api/users/toggle-public", headers=john)
+
+    offered = client.post("/api/skills/offered", headers=john, json={"name": "Go", "description": "Go services"}).json["skill"]
+    wanted = client.post("/api/skills/wanted", headers=john, json={"name": "Rust", "description": "Systems"}).json["skill"]
+    client.delete(f"/api/skills/offered/{offered['id']}", headers=john)
+    client.delete(f"/api/skills/wanted/{wanted['id']}", headers=john)
+    batch = client.post("/api/skills/batch", headers=john, json={
+        "offered": {"add": [{"name": "Go", "description": "Go services"}]},
+        "wanted": {"add": [{"name": "Rust", "description": "Systems"}]}
+    }).json
+    client.post("/api/skills/batch", headers=john, json={
+        "offered": {"remove": [batch["skillsOffered"][-1]["id"]]},
+        "wanted": {"remove": [batch["skillsWanted"][-1]["id"]]}
+    })
+    client.get("/api/matches", headers=john)
+    client.get("/api/matches?min_overlap=60", headers=john)
+
+    swap = client.post("/api/swap-requests", headers=john, json={
+        "receiverId": sarah_id, "skillOffered": {"name": "React"}, "skillRequested": {"name": "UI/UX"}
+    }).json["request"]
+    client.post("/api/swap-requests", headers=john, json={
+        "receiverId": sarah_id, "skillOffered": {"name": "Node.js"}, "skillRequested": {"name": "Photoshop"}
+    })
+    inbox = client.get("/api/swap-requests?limit=1", headers=sarah).json
+    client.get(f"/api/swap-requests?limit=1&after={inbox['next']}", headers=sarah)
+    client.get("/api/swap-requests?box=received&status=pending", headers=sarah)
+    client.get("/api/swap-requests?updated_since=2000-01-01T00:00:00", headers=sarah)
+    client.get(f"/api/swap-requests/{swap['id']}/slots?duration=90", headers=sarah)
+    client.put(f"/api/swap-requests/{swap['id']}/status", headers=sarah, json={"status": "completed"})
+    client.post("/api/feedback", headers=john, json={"swapRequestId": swap["id"], "toUserId": sarah_id, "rating": 5})
+    client.get(f"/api/feedback/user/{sarah_id}")
+    client.get("/api/users/top-rated?min_count=1")
+    client.delete(f"/api/swap-requests/{swap['id']}", headers=john)
+    client.get("/static/uploads/profile_photos/missing.png")
+    client.get("/metrics")
+
+
+def main():
+    verbose = "-v" in sys.argv[1:]
+    tables = set(db.metadata.tables)
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", capture)
+        exercise(app.test_client())
+        event.remove(db.engine, "before_cursor_execute", capture)
+
+        failures = []
+        with db.engine.connect() as conn:
+            for endpoint, statements in sorted(captured.items()):
+                for statement, parameters in statements:
+                    plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+                    details = [row[-1] for row in plan]
+                    sorts = any(SORT.match(d) for d in details)
+                    problems = [f"FULL SCAN of {m.group(1)}" for d in details if (m := FULL_SCAN.match(d)) and m.group(1) in tables]
+                    if sorts or not LIMITED.search(statement):
+                        problems += [
+                            f"INDEX SCAN of {m.group(1)}" for d in details if (m := INDEX_SCAN.match(d)) and m.group(1) in tables
+                        ]
+                    if sorts and endpoint in HOT_ENDPOINTS:
+                        problems.append("SORT")
+                    if problems:
+                        failures.append((endpoint, statement, details, problems))
+                    if verbose:
+                        print(f"[{endpoint}] {' '.join(statement.split())}")
+                        for detail in details:
+                            print(f"    {detail}")
+
+    endpoints = {rule.endpoint for rule in app.url_map.iter_rules() if rule.endpoint != "static"}
+    missing = sorted(endpoints - set(captured) - {"getprofilephoto", "logoutuser", "eventstream", "metrics"})
+
+    for endpoint, statement, details, problems in failures:
+        print(f"{', '.join(problems)} in {endpoint}: {' '.join(statement.split())}")
+        for detail in details:
+            print(f"    {detail}")
+    for endpoint in missing:
+        print(f"NOT EXERCISED: {endpoint}")
+
+    count = sum(len(statements) for statements in captured.values())
+    print(f"{count} statements across {len(captured)} endpoints, {len(failures)} with full scans or sorts")
+    return 1 if failures or missing else 0
+
+
+if __name__ == "__main__":
+    try:
+        status = main()
+    finally:
+        shutil.rmtree(SCRATCH, ignore_errors=True)
+    sys.exit(status)
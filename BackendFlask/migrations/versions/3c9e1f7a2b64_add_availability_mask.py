@@ -0,0 +1,59 @@
+"""add availability mask
+
+Revision ID: 3c9e1f7a2b64
+Revises: 5eba8bf4adfb
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from application import availability as week
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9e1f7a2b64'
+down_revision = '5eba8bf4adfb'
+branch_labels = None
+depends_on = None
+
+
+BATCH_SIZE = 5000
+
+
+def upgrade():
+    # Databases created after the column was declared already have it from db.create_all()
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("users")}
+    if "availability_mask" not in columns:
+        op.add_column("users", sa.Column("availability_mask", sa.LargeBinary(week.MASK_BYTES), nullable=True))
+
+    users = sa.table("users", sa.column("id", sa.Integer), sa.column("availability", sa.JSON),
+                     sa.column("availability_mask", sa.LargeBinary))
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(users.c.id, users.c.availability)
+            .where(users.c.id > last_id)
+            .order_by(users.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        updates = []
+        for user_id, slots in rows:
+            try:
+                mask = week.week_mask(slots or [])
+            except ValueError:
+                # Unreadable entries were never usable; such users show as unavailable until they save again
+                mask = 0
+            updates.append({"user_id": user_id, "mask": week.to_bytes(mask)})
+        conn.execute(
+            users.update().where(users.c.id == sa.bindparam("user_id")).values(availability_mask=sa.bindparam("mask")),
+            updates
+        )
+        last_id = rows[-1][0]
+
+
+def downgrade():
+    op.drop_column("users", "availability_mask")
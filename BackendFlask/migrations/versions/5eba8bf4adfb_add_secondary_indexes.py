@@ -0,0 +1,46 @@
+"""add secondary indexes
+
+Revision ID: 5eba8bf4adfb
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5eba8bf4adfb'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# The tables themselves come from db.create_all() in init_db, so some of
+# these indexes may already exist on databases created after they were
+# declared on the models.
+INDEXES = [
+    ("ix_users_is_public_id", "users", ["is_public", "id"]),
+    ("ix_skills_user_id", "skills", ["user_id"]),
+    ("ix_skills_name", "skills", ["name"]),
+    ("ix_skills_wanted_user_id", "skills_wanted", ["user_id"]),
+    ("ix_skills_wanted_name", "skills_wanted", ["name"]),
+    ("ix_swap_requests_status", "swap_requests", ["status"]),
+    ("ix_swap_requests_sender_status_updated", "swap_requests", ["sender_id", "status", "updated_at"]),
+    ("ix_swap_requests_receiver_status_updated", "swap_requests", ["receiver_id", "status", "updated_at"]),
+    ("ix_swap_requests_sender_created", "swap_requests", ["sender_id", "created_at"]),
+    ("ix_swap_requests_receiver_created", "swap_requests", ["receiver_id", "created_at"]),
+    ("ix_feedbacks_swap_request_id", "feedbacks", ["swap_request_id"]),
+    ("ix_feedbacks_from_user_id", "feedbacks", ["from_user_id"]),
+    ("ix_feedbacks_to_user_id", "feedbacks", ["to_user_id"]),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
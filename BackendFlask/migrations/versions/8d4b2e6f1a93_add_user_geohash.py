@@ -0,0 +1,62 @@
+"""add user geohash
+
+Revision ID: 8d4b2e6f1a93
+Revises: 3c9e1f7a2b64
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from application import geo
+
+
+# revision identifiers, used by Alembic.
+revision = '8d4b2e6f1a93'
+down_revision = '3c9e1f7a2b64'
+branch_labels = None
+depends_on = None
+
+
+BATCH_SIZE = 5000
+
+
+def upgrade():
+    # Databases created after the columns were declared already have them from db.create_all()
+    inspector = sa.inspect(op.get_bind())
+    columns = {column["name"] for column in inspector.get_columns("users")}
+    if "geohash" not in columns:
+        op.add_column("users", sa.Column("latitude", sa.Float(), nullable=True))
+        op.add_column("users", sa.Column("longitude", sa.Float(), nullable=True))
+        op.add_column("users", sa.Column("geohash", sa.String(geo.GEOHASH_PRECISION), nullable=True))
+    if "ix_users_is_public_geohash" not in {index["name"] for index in inspector.get_indexes("users")}:
+        op.create_index("ix_users_is_public_geohash", "users", ["is_public", "geohash"])
+
+    users = sa.table("users", sa.column("id", sa.Integer), sa.column("location", sa.String),
+                     sa.column("latitude", sa.Float), sa.column("longitude", sa.Float), sa.column("geohash", sa.String))
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(users.c.id, users.c.location)
+            .where(users.c.id > last_id)
+            .order_by(users.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        updates = [{"user_id": user_id, **geo.locate(location)} for user_id, location in rows]
+        conn.execute(
+            users.update().where(users.c.id == sa.bindparam("user_id")).values(
+                latitude=sa.bindparam("latitude"), longitude=sa.bindparam("longitude"), geohash=sa.bindparam("geohash")
+            ),
+            updates
+        )
+        last_id = rows[-1][0]
+
+
+def downgrade():
+    op.drop_index("ix_users_is_public_geohash", table_name="users")
+    op.drop_column("users", "geohash")
+    op.drop_column("users", "longitude")
+    op.drop_column("users", "latitude")
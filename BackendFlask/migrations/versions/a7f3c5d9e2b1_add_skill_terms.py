@@ -0,0 +1,97 @@
+"""add skill terms
+
+Revision ID: a7f3c5d9e2b1
+Revises: 8d4b2e6f1a93
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from application import taxonomy
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7f3c5d9e2b1'
+down_revision = '8d4b2e6f1a93'
+branch_labels = None
+depends_on = None
+
+
+BATCH_SIZE = 5000
+
+SKILL_TABLES = ["skills", "skills_wanted"]
+
+
+def upgrade():
+    # Databases created after the table was declared already have it from db.create_all()
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("skill_terms"):
+        op.create_table(
+            "skill_terms",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("key", sa.String(100), nullable=False, unique=True),
+            sa.Column("name", sa.String(100), nullable=False),
+            sa.Column("category", sa.String(50), nullable=True),
+        )
+    for table in SKILL_TABLES:
+        if "term_id" not in {column["name"] for column in inspector.get_columns(table)}:
+            # Batch mode, since SQLite cannot add the foreign key with ALTER TABLE
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.add_column(sa.Column(
+                    "term_id", sa.Integer(), sa.ForeignKey("skill_terms.id", name=f"fk_{table}_term_id"), nullable=True
+                ))
+        if f"ix_{table}_term_id" not in {index["name"] for index in inspector.get_indexes(table)}:
+            op.create_index(f"ix_{table}_term_id", table, ["term_id"])
+
+    conn = op.get_bind()
+    terms = sa.table("skill_terms", sa.column("id", sa.Integer), sa.column("key", sa.String),
+                     sa.column("name", sa.String), sa.column("category", sa.String))
+    ids = dict(conn.execute(sa.select(terms.c.key, terms.c.id)).all())
+    seeds = [{"key": key, "name": name, "category": category} for key, name, category in taxonomy.seeds() if key not in ids]
+    if seeds:
+        conn.execute(terms.insert(), seeds)
+        ids = dict(conn.execute(sa.select(terms.c.key, terms.c.id)).all())
+
+    for name in SKILL_TABLES:
+        skills = sa.table(name, sa.column("name", sa.String), sa.column("category", sa.String),
+                          sa.column("term_id", sa.Integer))
+        last = ""
+        while True:
+            rows = conn.execute(
+                sa.select(skills.c.name, sa.func.min(skills.c.category))
+                .where(skills.c.term_id.is_(None), skills.c.name > last)
+                .group_by(skills.c.name)
+                .order_by(skills.c.name)
+                .limit(BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            last = rows[-1][0]
+            new = {}
+            for skill_name, category in rows:
+                key = taxonomy.term_key(skill_name)
+                if key and key not in ids and key not in new:
+                    new[key] = {"key": key, "name": taxonomy.term_name(key, skill_name), "category": category}
+            if new:
+                conn.execute(terms.insert(), list(new.values()))
+                ids.update(conn.execute(sa.select(terms.c.key, terms.c.id).where(terms.c.key.in_(new))).all())
+            updates = [
+                {"skill_name": skill_name, "term": ids[key]}
+                for skill_name, _ in rows if (key := taxonomy.term_key(skill_name))
+            ]
+            if updates:
+                conn.execute(
+                    skills.update()
+                    .where(skills.c.name == sa.bindparam("skill_name"), skills.c.term_id.is_(None))
+                    .values(term_id=sa.bindparam("term")),
+                    updates
+                )
+
+
+def downgrade():
+    for table in SKILL_TABLES:
+        op.drop_index(f"ix_{table}_term_id", table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("term_id")
+    op.drop_table("skill_terms")
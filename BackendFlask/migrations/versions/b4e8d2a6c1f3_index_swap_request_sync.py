@@ -0,0 +1,36 @@
+"""index swap request sync
+
+Revision ID: b4e8d2a6c1f3
+Revises: a7f3c5d9e2b1
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4e8d2a6c1f3'
+down_revision = 'a7f3c5d9e2b1'
+branch_labels = None
+depends_on = None
+
+
+# updated_since syncs order by (updated_at, id) within one user's box; with
+# status between the two columns the old indexes could not deliver that
+# order, so every sync sorted the user's changes in a temp b-tree
+REPLACED = [
+    ("ix_swap_requests_sender_status_updated", "ix_swap_requests_sender_updated", "sender_id"),
+    ("ix_swap_requests_receiver_status_updated", "ix_swap_requests_receiver_updated", "receiver_id"),
+]
+
+
+def upgrade():
+    for old, new, column in REPLACED:
+        op.create_index(new, "swap_requests", [column, "updated_at"], if_not_exists=True)
+        op.drop_index(old, table_name="swap_requests", if_exists=True)
+
+
+def downgrade():
+    for old, new, column in reversed(REPLACED):
+        op.create_index(old, "swap_requests", [column, "status", "updated_at"], if_not_exists=True)
+        op.drop_index(new, table_name="swap_requests", if_exists=True)